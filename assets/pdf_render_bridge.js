@@ -0,0 +1,135 @@
+/**
+ * Client-side page rendering with PDF.js for the opt-in "browser" render
+ * mode.  PDF.js is imported lazily the first time a page is rendered, from
+ * the copy under assets/pdfjs/ (see vendor_pdfjs.sh); set
+ * window.PDFJS_BASE_URL before this script loads to serve it from elsewhere.
+ *
+ * Results are reported to the backend through the hidden
+ * #pdf-render-report-input, the same way draw_helpers.js reports boxes.
+ */
+(function () {
+    var PDFJS_BASE_URL = window.PDFJS_BASE_URL || '/pdfjs/';
+
+    var pdfjsLib = null;
+    var loaded = { url: null, task: null, doc: null };
+    var renderTask = null;
+    var requestSeq = 0;
+
+    function loadPdfjs() {
+        if (!pdfjsLib) {
+            pdfjsLib = import(PDFJS_BASE_URL + 'pdf.min.mjs').then(function (lib) {
+                lib.GlobalWorkerOptions.workerSrc = PDFJS_BASE_URL + 'pdf.worker.min.mjs';
+                return lib;
+            });
+        }
+        return pdfjsLib;
+    }
+
+    function loadDocument(url) {
+        if (loaded.url !== url) {
+            if (loaded.task) loaded.task.destroy();
+            loaded.url = url;
+            loaded.task = null;
+            loaded.doc = loadPdfjs().then(function (lib) {
+                // Fetch only the byte ranges the requested pages need.
+                loaded.task = lib.getDocument({
+                    url: url,
+                    disableAutoFetch: true,
+                    disableStream: true,
+                    rangeChunkSize: 65536,
+                });
+                return loaded.task.promise;
+            }).catch(function (err) {
+                loaded.url = null;  // let the next request retry
+                throw err;
+            });
+        }
+        return loaded.doc;
+    }
+
+    function report(data) {
+        var input = document.getElementById('pdf-render-report-input');
+        if (!input) {
+            console.error('[PdfJs] Report input not found');
+            return;
+        }
+        var setter = Object.getOwnPropertyDescriptor(
+            window.HTMLInputElement.prototype, 'value'
+        ).set;
+        setter.call(input, JSON.stringify(data));
+        input.dispatchEvent(new Event('input', { bubbles: true }));
+        input.dispatchEvent(new Event('change', { bubbles: true }));
+    }
+
+    function waitForCanvas(canvasId, seq, attempts) {
+        return new Promise(function (resolve, reject) {
+            (function poll(left) {
+                var canvas = document.getElementById(canvasId);
+                if (seq !== requestSeq) return resolve(null);
+                if (canvas) return resolve(canvas);
+                if (left <= 0) return reject(new Error('Canvas ' + canvasId + ' not found'));
+                setTimeout(function () { poll(left - 1); }, 60);
+            })(attempts);
+        });
+    }
+
+    /**
+     * Render a one-based page of the PDF at ``url`` into the canvas.
+     * A newer call cancels the render in flight, so only the page the user
+     * settles on is reported back.
+     */
+    window.renderPdfPage = function (url, pageNumber, scale, canvasId) {
+        var seq = ++requestSeq;
+        if (renderTask) {
+            renderTask.cancel();
+            renderTask = null;
+        }
+        loadDocument(url)
+            .then(function (doc) {
+                if (seq !== requestSeq) return null;
+                return Promise.all([
+                    doc,
+                    doc.getPage(pageNumber),
+                    waitForCanvas(canvasId, seq, 50),
+                ]);
+            })
+            .then(function (result) {
+                if (!result || seq !== requestSeq || !result[2]) return null;
+                var doc = result[0];
+                var page = result[1];
+                var canvas = result[2];
+                var viewport = page.getViewport({ scale: scale });
+                canvas.width = Math.ceil(viewport.width);
+                canvas.height = Math.ceil(viewport.height);
+                renderTask = page.render({
+                    canvasContext: canvas.getContext('2d'),
+                    viewport: viewport,
+                });
+                return renderTask.promise.then(function () {
+                    if (seq !== requestSeq) return;
+                    renderTask = null;
+                    report({
+                        page: pageNumber,
+                        numPages: doc.numPages,
+                        width: canvas.width,
+                        height: canvas.height,
+                    });
+                });
+            })
+            .catch(function (err) {
+                if (err && err.name === 'RenderingCancelledException') return;
+                if (seq !== requestSeq) return;
+                console.error('[PdfJs] Render failed', err);
+                report({ page: pageNumber, error: String((err && err.message) || err) });
+            });
+    };
+
+    /** Drop the loaded document, e.g. when switching back to server rendering. */
+    window.releasePdfDocument = function () {
+        requestSeq++;
+        if (renderTask) renderTask.cancel();
+        if (loaded.task) loaded.task.destroy();
+        renderTask = null;
+        loaded = { url: null, task: null, doc: null };
+    };
+})();
@@ -1,16 +1,23 @@
 import reflex as rx
-from pdf_signature.states.pdf_state import PDFState
+from pdf_signature.states.pdf_state import (
+    BoxesState,
+    ExportState,
+    PDFState,
+    SigningState,
+    ViewerState,
+)
+from pdf_signature.utils.render import RENDER_MODES
 
 
 def render_signature_box(box: dict) -> rx.Component:
     """Render a single signature box overlay."""
-    is_signed = box["signature_data_url"] != ""
+    is_signed = box["signature_ref"] != ""
     return rx.el.div(
         rx.cond(
             is_signed,
             rx.el.div(
                 rx.image(
-                    src=box["signature_data_url"],
+                    src=f"{BoxesState.signature_blobs_url}/{box['signature_ref']}",
                     class_name="w-full h-full",
                     style={"objectFit": "fill"},
                 ),
@@ -34,7 +41,7 @@ def render_signature_box(box: dict) -> rx.Component:
             "width": f"{box['w']}%",
             "height": f"{box['h']}%",
         },
-        on_click=lambda: PDFState.open_signing_modal(box["id"]),
+        on_click=lambda: SigningState.open_signing_modal(box["id"]),
         class_name=rx.cond(
             is_signed,
             "absolute border-2 border-green-500 bg-green-50/20 flex items-center justify-center z-10 hover:bg-green-100/30 transition-colors pointer-events-auto cursor-pointer",
@@ -48,35 +55,49 @@ def pdf_viewer_canvas() -> rx.Component:
     return rx.el.div(
         rx.el.div(
             rx.cond(
-                PDFState.page_image_url != "",
-                rx.image(
-                    src=PDFState.page_image_url,
+                ViewerState.render_mode == "client",
+                rx.el.canvas(
+                    id="pdf-client-canvas",
                     class_name="shadow-2xl border border-gray-200 bg-white rounded-sm",
                     style={
                         "width": "100%",
                         "height": "auto",
-                        "maxWidth": PDFState.page_image_scaled_width_px,
+                        "aspectRatio": f"{ViewerState.page_image_width}/{ViewerState.page_image_height}",
                     },
                 ),
-                rx.el.div(
-                    class_name="shadow-2xl border border-gray-200 bg-white rounded-sm",
-                    style={
-                        "width": "100%",
-                        "maxWidth": rx.cond(
-                            PDFState.page_image_scaled_width_px != "0px",
-                            PDFState.page_image_scaled_width_px,
-                            "640px",
-                        ),
-                        "aspectRatio": rx.cond(
-                            PDFState.page_image_height_px != "0px",
-                            f"{PDFState.page_image_width}/{PDFState.page_image_height}",
-                            "640/820",
-                        ),
-                    },
+                rx.cond(
+                    ViewerState.page_image_url != "",
+                    # Drafts are low-resolution, so size the image from the page
+                    # layout rather than from its pixels.
+                    rx.image(
+                        src=ViewerState.page_image_url,
+                        class_name="shadow-2xl border border-gray-200 bg-white rounded-sm",
+                        style={
+                            "width": "100%",
+                            "height": "auto",
+                            "aspectRatio": f"{ViewerState.page_image_width}/{ViewerState.page_image_height}",
+                        },
+                    ),
+                    rx.el.div(
+                        class_name="shadow-2xl border border-gray-200 bg-white rounded-sm",
+                        style={
+                            "width": "100%",
+                            "maxWidth": rx.cond(
+                                ViewerState.page_image_scaled_width_px != "0px",
+                                ViewerState.page_image_scaled_width_px,
+                                "640px",
+                            ),
+                            "aspectRatio": rx.cond(
+                                ViewerState.page_image_height_px != "0px",
+                                f"{ViewerState.page_image_width}/{ViewerState.page_image_height}",
+                                "640/820",
+                            ),
+                        },
+                    ),
                 ),
             ),
             rx.cond(
-                PDFState.is_rendering,
+                ViewerState.is_rendering,
                 rx.el.div(
                     rx.el.div(
                         rx.spinner(size="3", class_name="text-blue-500"),
@@ -108,26 +129,40 @@ def pdf_viewer_canvas() -> rx.Component:
                 ),
             ),
             rx.el.div(
-                rx.foreach(PDFState.signature_boxes, render_signature_box),
+                rx.foreach(BoxesState.signature_boxes, render_signature_box),
                 class_name="absolute inset-0 z-10",
             ),
             rx.el.input(
                 type="text",
                 id="new-box-data-input",
-                on_change=PDFState.add_box,
+                on_change=BoxesState.add_box,
+                style={"position": "absolute", "left": "-9999px", "opacity": "0", "pointer_events": "none"},
+            ),
+            rx.el.input(
+                type="text",
+                id="pdf-render-report-input",
+                on_change=ViewerState.report_client_render,
                 style={"position": "absolute", "left": "-9999px", "opacity": "0", "pointer_events": "none"},
             ),
             rx.cond(
-                PDFState.is_drawing_box,
+                BoxesState.is_drawing_box,
                 rx.el.div(
                     class_name="absolute inset-0 z-50 cursor-crosshair",
                 ),
             ),
             class_name=rx.cond(
-                PDFState.is_drawing_box,
+                BoxesState.is_drawing_box,
                 "relative inline-block m-auto cursor-crosshair",
                 "relative inline-block m-auto",
             ),
+            style={
+                "width": rx.cond(
+                    ViewerState.page_image_width > 0,
+                    ViewerState.page_image_scaled_width_px,
+                    "auto",
+                ),
+                "maxWidth": "100%",
+            },
             id="pdf-image-container",
         ),
         class_name="flex w-full overflow-auto bg-gray-100/50 p-8 custom-scrollbar justify-center items-start",
@@ -135,13 +170,27 @@ def pdf_viewer_canvas() -> rx.Component:
     )
 
 
+def render_mode_select() -> rx.Component:
+    """Switch between server and browser rendering, once PDF.js is vendored."""
+    if "client" not in RENDER_MODES:
+        return rx.fragment()
+    return rx.el.select(
+        rx.el.option("Server render", value="server"),
+        rx.el.option("Browser render", value="client"),
+        value=ViewerState.render_mode,
+        on_change=ViewerState.set_render_mode,
+        title="Page rendering",
+        class_name="px-2 py-1.5 text-sm text-gray-700 bg-white border border-gray-200 rounded-lg",
+    )
+
+
 def pdf_controls() -> rx.Component:
     """Toolbar for controlling the PDF viewer."""
     return rx.el.div(
         rx.el.div(
             rx.el.button(
                 rx.icon("chevron-left", class_name="h-5 w-5"),
-                on_click=PDFState.prev_page,
+                on_click=ViewerState.prev_page,
                 disabled=PDFState.current_page <= 1,
                 class_name="p-2 hover:bg-gray-100 rounded-lg disabled:opacity-30 transition-colors",
             ),
@@ -151,7 +200,7 @@ def pdf_controls() -> rx.Component:
             ),
             rx.el.button(
                 rx.icon("chevron-right", class_name="h-5 w-5"),
-                on_click=PDFState.next_page,
+                on_click=ViewerState.next_page,
                 disabled=PDFState.current_page >= PDFState.num_pages,
                 class_name="p-2 hover:bg-gray-100 rounded-lg disabled:opacity-30 transition-colors",
             ),
@@ -160,7 +209,7 @@ def pdf_controls() -> rx.Component:
         rx.el.div(
             rx.el.button(
                 rx.icon("minus", class_name="h-4 w-4"),
-                on_click=PDFState.zoom_out,
+                on_click=ViewerState.zoom_out,
                 class_name="p-2 hover:bg-gray-100 rounded-lg transition-colors",
             ),
             rx.el.input(
@@ -168,47 +217,78 @@ def pdf_controls() -> rx.Component:
                 min=25,
                 max=300,
                 step=5,
-                key=PDFState.scale_percent.to(str),
-                default_value=PDFState.scale_percent.to(str),
-                on_change=lambda v: PDFState.set_zoom([v.to(int)]).throttle(100),
+                key=ViewerState.scale_percent.to(str),
+                default_value=ViewerState.scale_percent.to(str),
+                on_change=lambda v: ViewerState.set_zoom([v.to(int)]).throttle(100),
                 class_name="w-32 h-1.5 bg-gray-200 rounded-lg appearance-none cursor-pointer accent-blue-600",
             ),
             rx.el.button(
                 rx.icon("plus", class_name="h-4 w-4"),
-                on_click=PDFState.zoom_in,
+                on_click=ViewerState.zoom_in,
                 class_name="p-2 hover:bg-gray-100 rounded-lg transition-colors",
             ),
             rx.el.span(
-                f"{PDFState.scale_percent}%",
+                f"{ViewerState.scale_percent}%",
                 class_name="text-sm font-medium text-gray-600 w-12",
             ),
+            render_mode_select(),
             class_name="flex items-center gap-4 pl-4 border-r pr-4",
         ),
         rx.el.div(
             rx.el.button(
                 rx.icon("box-select", class_name="h-4 w-4"),
-                rx.cond(PDFState.is_drawing_box, "Cancel Draw", "Draw Box"),
-                on_click=PDFState.toggle_drawing_mode,
+                rx.cond(BoxesState.is_drawing_box, "Cancel Draw", "Draw Box"),
+                on_click=BoxesState.toggle_drawing_mode,
                 class_name=rx.cond(
-                    PDFState.is_drawing_box,
+                    BoxesState.is_drawing_box,
                     "flex items-center gap-2 px-3 py-1.5 bg-blue-100 text-blue-700 rounded-lg font-medium text-sm transition-colors border border-blue-200",
                     "flex items-center gap-2 px-3 py-1.5 hover:bg-gray-100 text-gray-700 rounded-lg font-medium text-sm transition-colors",
                 ),
             ),
             rx.cond(
-                PDFState.signature_boxes.length() > 0,
+                BoxesState.signature_boxes.length() > 0,
                 rx.el.button(
                     rx.icon("trash-2", class_name="h-4 w-4"),
                     "Clear",
-                    on_click=PDFState.clear_boxes,
+                    on_click=BoxesState.clear_boxes,
                     class_name="flex items-center gap-2 px-3 py-1.5 hover:bg-red-50 text-red-600 rounded-lg font-medium text-sm transition-colors",
                 ),
             ),
+            rx.el.select(
+                rx.el.option("Fast", value="fast"),
+                rx.el.option("Smallest", value="smallest"),
+                rx.el.option("Web-optimised", value="web-optimised"),
+                value=ExportState.export_profile,
+                on_change=ExportState.set_export_profile,
+                title="Export profile",
+                class_name="px-2 py-1.5 text-sm text-gray-700 bg-white border border-gray-200 rounded-lg",
+            ),
+            rx.el.select(
+                rx.el.option("Draw into page", value="content"),
+                rx.el.option("Ink annotations", value="ink"),
+                rx.el.option("Ink, flattened", value="ink-flattened"),
+                value=ExportState.export_mode,
+                on_change=ExportState.set_export_mode,
+                title="How signatures are written",
+                class_name="px-2 py-1.5 text-sm text-gray-700 bg-white border border-gray-200 rounded-lg",
+            ),
+            rx.el.label(
+                rx.el.input(
+                    type="checkbox",
+                    checked=ExportState.retain_signed_copy,
+                    on_change=ExportState.toggle_retain_signed_copy,
+                    class_name="accent-blue-600",
+                ),
+                "Keep copy",
+                title="Also keep each signed PDF on the server",
+                class_name="flex items-center gap-1.5 px-2 text-sm text-gray-700",
+            ),
             rx.el.button(
                 rx.icon("download", class_name="h-4 w-4"),
                 "Export PDF",
-                on_click=PDFState.export_signed_pdf,
-                class_name="flex items-center gap-2 px-3 py-1.5 bg-gray-900 text-white rounded-lg font-medium text-sm hover:bg-gray-800 transition-colors",
+                on_click=ExportState.export_signed_pdf,
+                disabled=ExportState.is_exporting,
+                class_name="flex items-center gap-2 px-3 py-1.5 bg-gray-900 text-white rounded-lg font-medium text-sm hover:bg-gray-800 transition-colors disabled:opacity-50",
             ),
             class_name="flex items-center gap-2 pl-4",
         ),
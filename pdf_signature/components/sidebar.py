@@ -1,5 +1,11 @@
 import reflex as rx
-from pdf_signature.states.pdf_state import PDFState
+from pdf_signature.states.pdf_state import (
+    MAX_SESSION_DOCUMENTS,
+    BoxesState,
+    ExportState,
+    PDFState,
+    UploadState,
+)
 
 
 def signature_item(box: dict) -> rx.Component:
@@ -15,19 +21,56 @@ def signature_item(box: dict) -> rx.Component:
         ),
         rx.el.button(
             rx.icon("x", class_name="h-4 w-4"),
-            on_click=PDFState.delete_box(box["id"]),
+            on_click=BoxesState.delete_box(box["id"]),
             class_name="p-1 text-gray-400 hover:text-red-500 hover:bg-red-50 rounded transition-colors",
         ),
         class_name="flex items-center justify-between p-3 bg-white border border-gray-100 rounded-lg shadow-sm group hover:border-blue-200 transition-colors",
     )
 
 
+def document_item(document: dict) -> rx.Component:
+    """Render a session document; clicking it makes it the active one."""
+    is_active = document["id"] == UploadState.active_document_id
+    return rx.el.div(
+        rx.el.div(
+            rx.icon(
+                "file-text",
+                class_name=rx.cond(
+                    is_active, "h-5 w-5 text-blue-500", "h-5 w-5 text-gray-400"
+                ),
+            ),
+            rx.el.div(
+                rx.el.p(
+                    document["name"],
+                    class_name="text-sm font-medium text-gray-900 truncate w-32",
+                ),
+                rx.el.p(
+                    f"{document['num_pages']} pages",
+                    class_name="text-xs text-gray-500",
+                ),
+            ),
+            class_name="flex items-center gap-3",
+        ),
+        rx.el.button(
+            rx.icon("x", class_name="h-4 w-4"),
+            on_click=UploadState.close_document(document["id"]).stop_propagation,
+            class_name="p-1 text-gray-400 hover:text-red-500 hover:bg-red-50 rounded transition-colors",
+        ),
+        on_click=UploadState.switch_document(document["id"]),
+        class_name=rx.cond(
+            is_active,
+            "flex items-center justify-between p-3 bg-blue-50 rounded-xl border border-blue-100 cursor-pointer",
+            "flex items-center justify-between p-3 bg-white rounded-xl border border-gray-100 hover:border-blue-200 cursor-pointer transition-colors",
+        ),
+    )
+
+
 def upload_zone() -> rx.Component:
     """The drag-and-drop upload component."""
     return rx.upload.root(
         rx.el.div(
             rx.cond(
-                PDFState.is_uploading,
+                UploadState.is_uploading,
                 rx.el.div(
                     rx.spinner(size="3", class_name="text-blue-500"),
                     rx.el.p(
@@ -52,8 +95,8 @@ def upload_zone() -> rx.Component:
         ),
         id="pdf-upload",
         accept={"application/pdf": [".pdf"]},
-        max_files=1,
-        on_drop=PDFState.handle_upload(rx.upload_files(upload_id="pdf-upload")),
+        max_files=MAX_SESSION_DOCUMENTS,
+        on_drop=UploadState.handle_upload(rx.upload_files(upload_id="pdf-upload")),
     )
 
 
@@ -84,24 +127,14 @@ def sidebar() -> rx.Component:
                 PDFState.has_pdf,
                 rx.el.div(
                     rx.el.div(
-                        rx.icon("file-text", class_name="h-5 w-5 text-blue-500"),
-                        rx.el.div(
-                            rx.el.p(
-                                PDFState.uploaded_filename,
-                                class_name="text-sm font-medium text-gray-900 truncate w-32",
-                            ),
-                            rx.el.p(
-                                f"{PDFState.num_pages} pages",
-                                class_name="text-xs text-gray-500",
-                            ),
-                        ),
-                        class_name="flex items-center gap-3 p-3 bg-blue-50 rounded-xl border border-blue-100",
+                        rx.foreach(UploadState.documents, document_item),
+                        class_name="flex flex-col gap-2",
                     ),
                     rx.cond(
-                        PDFState.signed_pdf_url != "",
+                        ExportState.signed_pdf_url != "",
                         rx.el.a(
                             "Download Signed PDF",
-                            href=PDFState.signed_pdf_url,
+                            href=ExportState.signed_pdf_url,
                             download=True,
                             target="_blank",
                             rel="noopener noreferrer",
@@ -109,14 +142,21 @@ def sidebar() -> rx.Component:
                         ),
                     ),
                     rx.cond(
-                        PDFState.signature_boxes.length() > 0,
+                        ExportState.export_stats_label != "",
+                        rx.el.p(
+                            ExportState.export_stats_label,
+                            class_name="mt-2 text-xs text-gray-500 text-center",
+                        ),
+                    ),
+                    rx.cond(
+                        BoxesState.signature_boxes.length() > 0,
                         rx.el.div(
                             rx.el.h3(
                                 "Signature Areas",
                                 class_name="text-xs font-bold text-gray-400 uppercase tracking-widest mt-8 mb-4 px-2",
                             ),
                             rx.el.div(
-                                rx.foreach(PDFState.signature_boxes, signature_item),
+                                rx.foreach(BoxesState.signature_boxes, signature_item),
                                 class_name="flex flex-col gap-2",
                             ),
                         ),
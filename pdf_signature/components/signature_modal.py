@@ -1,5 +1,5 @@
 import reflex as rx
-from pdf_signature.states.pdf_state import PDFState
+from pdf_signature.states.pdf_state import SigningState
 
 
 def signature_modal() -> rx.Component:
@@ -8,7 +8,7 @@ def signature_modal() -> rx.Component:
         # ── backdrop ──
         rx.el.div(
             class_name="fixed inset-0 bg-black/50 backdrop-blur-sm z-50",
-            on_click=PDFState.close_signing_modal,
+            on_click=SigningState.close_signing_modal,
         ),
         # ── centred card ──
         rx.el.div(
@@ -20,7 +20,7 @@ def signature_modal() -> rx.Component:
                 # ── drawing area ──
                 rx.el.div(
                     rx.cond(
-                        PDFState.is_signing,
+                        SigningState.is_signing,
                         rx.el.div(
                             # placeholder text (behind canvas)
                             rx.el.span(
@@ -45,8 +45,8 @@ def signature_modal() -> rx.Component:
                                 "shadow-inner bg-white select-none overflow-hidden"
                             ),
                             style={
-                                "width": f"{PDFState.signature_pad_width}px",
-                                "height": f"{PDFState.signature_pad_height}px",
+                                "width": f"{SigningState.signature_pad_width}px",
+                                "height": f"{SigningState.signature_pad_height}px",
                             },
                         ),
                     ),
@@ -56,7 +56,7 @@ def signature_modal() -> rx.Component:
                 rx.el.div(
                     rx.el.button(
                         "Clear",
-                        on_click=PDFState.clear_signature_pad,
+                        on_click=SigningState.clear_signature_pad,
                         class_name=(
                             "px-4 py-2 text-sm font-medium text-gray-700 "
                             "bg-gray-100 hover:bg-gray-200 rounded-lg transition-colors"
@@ -65,7 +65,7 @@ def signature_modal() -> rx.Component:
                     rx.el.div(
                         rx.el.button(
                             "Cancel",
-                            on_click=PDFState.close_signing_modal,
+                            on_click=SigningState.close_signing_modal,
                             class_name=(
                                 "px-4 py-2 text-sm font-medium text-gray-700 "
                                 "hover:bg-gray-100 rounded-lg transition-colors"
@@ -75,7 +75,7 @@ def signature_modal() -> rx.Component:
                             "Apply Signature",
                             on_click=rx.call_script(
                                 "window.getSignatureSVG()",
-                                callback=PDFState.apply_signature_data,
+                                callback=SigningState.apply_signature_data,
                             ),
                             class_name=(
                                 "px-4 py-2 text-sm font-bold text-white "
@@ -92,5 +92,5 @@ def signature_modal() -> rx.Component:
             class_name="fixed inset-0 flex items-center justify-center z-50 p-4",
         ),
         id="sig-modal-container",
-        class_name=rx.cond(PDFState.is_signing, "block", "hidden"),
+        class_name=rx.cond(SigningState.is_signing, "block", "hidden"),
     )
\ No newline at end of file
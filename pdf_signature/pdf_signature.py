@@ -1,9 +1,28 @@
+import asyncio
+import hashlib
 import logging
+from urllib.parse import quote
+
+# Imported first: the app module's import time is measured from here.
+from pdf_signature.utils import startup
 
 import reflex as rx
 from fastapi import Request
-from starlette.responses import JSONResponse
+from starlette.responses import FileResponse, JSONResponse, Response
 from pdf_signature.states.pdf_state import PDFState
+from pdf_signature.utils.artifacts import (
+    EXPOSE_HEADERS,
+    IMMUTABLE_CACHE_CONTROL,
+    artifact_etag,
+    cache_control,
+    etag_matches,
+    parse_byte_range,
+    resolve_artifact,
+)
+from pdf_signature.utils.blobs import blob_path, refresh_blob
+from pdf_signature.utils.downloads import load_export
+from pdf_signature.utils.housekeeping import sweep_caches
+from pdf_signature.utils.storage import io_stats, stat_file
 from pdf_signature.components.sidebar import sidebar
 from pdf_signature.components.pdf_viewer import pdf_controls, pdf_viewer_canvas
 from pdf_signature.components.signature_modal import signature_modal
@@ -15,6 +34,7 @@ def index() -> rx.Component:
         rx.script(src="/signature_pad.umd.min.js"),
         rx.script(src="/signature_pad_bridge.js"),
         rx.script(src="/draw_helpers.js"),
+        rx.script(src="/pdf_render_bridge.js"),
         signature_modal(),
         rx.el.div(
             sidebar(),
@@ -155,6 +175,96 @@ async def frontend_log(request: Request):
     return JSONResponse({"ok": True})
 
 
+async def storage_stats(request: Request):
+    return JSONResponse(io_stats())
+
+
+async def startup_stats(request: Request):
+    return JSONResponse(startup.startup_report())
+
+
+async def signature_blob(request: Request):
+    path = blob_path(request.path_params["ref"])
+    stat = await stat_file(path) if path is not None else None
+    if stat is None or not await refresh_blob(path, stat):
+        return JSONResponse({"error": "Blob not found."}, status_code=404)
+    headers = {
+        "ETag": f'"{path.name}"',
+        "Cache-Control": IMMUTABLE_CACHE_CONTROL,
+        # User-supplied SVG: never run its scripts when opened directly.
+        "Content-Security-Policy": "default-src 'none'; style-src 'unsafe-inline'",
+        "X-Content-Type-Options": "nosniff",
+    }
+    if etag_matches(request.headers.get("if-none-match"), headers["ETag"]):
+        return Response(status_code=304, headers=headers)
+    return FileResponse(
+        path, media_type="image/svg+xml", headers=headers, stat_result=stat
+    )
+
+
+async def upload_artifact(request: Request):
+    name = request.path_params["name"]
+    path = resolve_artifact(name)
+    stat = await stat_file(path) if path is not None else None
+    if stat is None:
+        return JSONResponse({"error": "File not found."}, status_code=404)
+    headers = {
+        "ETag": artifact_etag(name, stat),
+        "Cache-Control": cache_control(name),
+        "Access-Control-Expose-Headers": EXPOSE_HEADERS,
+    }
+    if etag_matches(request.headers.get("if-none-match"), headers["ETag"]):
+        return Response(status_code=304, headers=headers)
+    # FileResponse serves Range/If-Range requests against the ETag above.
+    return FileResponse(path, headers=headers, stat_result=stat)
+
+
+async def signed_pdf_download(request: Request):
+    export_id = request.path_params["export_id"]
+    download_name = request.path_params["filename"]
+    data = await asyncio.to_thread(load_export, export_id)
+    if data is None:
+        return JSONResponse({"error": "Export not found."}, status_code=404)
+    headers = {
+        "Content-Disposition": f"attachment; filename*=UTF-8''{quote(download_name)}",
+        "Cache-Control": IMMUTABLE_CACHE_CONTROL,
+        "ETag": f'"{hashlib.sha256(data).hexdigest()[:32]}"',
+        "Accept-Ranges": "bytes",
+        "Access-Control-Expose-Headers": EXPOSE_HEADERS,
+    }
+    if etag_matches(request.headers.get("if-none-match"), headers["ETag"]):
+        return Response(status_code=304, headers=headers)
+    if_range = request.headers.get("if-range")
+    try:
+        byte_range = None
+        if if_range is None or if_range == headers["ETag"]:
+            byte_range = parse_byte_range(request.headers.get("range"), len(data))
+    except ValueError:
+        headers["Content-Range"] = f"bytes */{len(data)}"
+        return Response(status_code=416, headers=headers)
+    if byte_range is not None:
+        start, end = byte_range
+        headers["Content-Range"] = f"bytes {start}-{end - 1}/{len(data)}"
+        return Response(
+            data[start:end],
+            status_code=206,
+            media_type="application/pdf",
+            headers=headers,
+        )
+    return Response(data, media_type="application/pdf", headers=headers)
+
+
 if app._api:
     app._api.add_route("/api/frontend-log", frontend_log, methods=["POST"])
-app.add_page(index, route="/")
\ No newline at end of file
+    app._api.add_route("/api/storage-stats", storage_stats, methods=["GET"])
+    app._api.add_route("/api/startup-stats", startup_stats, methods=["GET"])
+    app._api.add_route("/api/blobs/{ref}", signature_blob, methods=["GET"])
+    app._api.add_route("/api/files/{name}", upload_artifact, methods=["GET", "HEAD"])
+    app._api.add_route(
+        "/api/signed/{export_id}/{filename}", signed_pdf_download, methods=["GET"]
+    )
+app.add_page(index, route="/")
+app.register_lifespan_task(startup.on_startup)
+app.register_lifespan_task(startup.stop_sandbox)
+app.register_lifespan_task(sweep_caches)
+startup.mark("imported")
@@ -1,15 +1,96 @@
+import asyncio
+import copy
 import reflex as rx
 import random
 import string
 import json
 import logging
-import re
-import base64
+import math
+from pathlib import Path
 from typing import TypedDict
+from urllib.parse import quote
 
-import fitz
 from reflex.config import get_config
 
+from pdf_signature.utils.artifacts import render_image_name
+from pdf_signature.utils.blobs import get_blob, put_blob
+from pdf_signature.utils.doc_index import (
+    PREVIEW_SCALE,
+    get_document_info,
+    index_document,
+    page_size,
+    resolve_source,
+)
+from pdf_signature.utils.downloads import (
+    cached_export_stats,
+    export_fingerprint,
+    register_export,
+    retain_export,
+)
+from pdf_signature.utils.export import (
+    DEFAULT_EXPORT_MODE,
+    DEFAULT_EXPORT_PROFILE,
+    EXPORT_MODES,
+    EXPORT_PROFILES,
+    render_signed,
+)
+from pdf_signature.utils.render import (
+    DEFAULT_RENDER_MODE,
+    DRAFT_SCALE,
+    RENDER_MODES,
+    RENDER_SETTLE_SECONDS,
+)
+from pdf_signature.utils.render_cache import lookup_render, render_once
+from pdf_signature.utils.sandbox import run_sandboxed
+from pdf_signature.utils.storage import (
+    IOWait,
+    read_bytes,
+    run_io,
+    stat_file,
+    track_io_wait,
+    write_bytes,
+)
+from pdf_signature.utils.strokes import (
+    DEFAULT_STROKE_TOLERANCE_PT,
+    DEFAULT_WIDTH_STEP_PT,
+)
+
+
+# Documents a session can hold at once.
+MAX_SESSION_DOCUMENTS = 10
+
+# Most recently used documents that keep their rendered page, so switching
+# back to one of them needs no render.
+MAX_HOT_DOCUMENTS = 3
+
+# Per-document fields, swapped in and out as the user switches documents.
+# Each field lives on PDFState or one of its substates (see _document_owners).
+BLANK_DOCUMENT: dict = {
+    "_uploaded_filename": "",
+    "_source_filename": "",
+    "_document_hash": "",
+    "num_pages": 1,
+    "current_page": 1,
+    "signature_boxes": [],
+    "render_error": "",
+    "page_image_filename": "",
+    "page_image_is_draft": False,
+    "page_image_width": 0,
+    "page_image_height": 0,
+    "_export_id": "",
+    "_export_size_bytes": 0,
+    "_export_save_ms": 0.0,
+    "_export_profile": "",
+}
+DOCUMENT_FIELDS = tuple(BLANK_DOCUMENT)
+
+
+class DocumentEntry(TypedDict):
+    id: str
+    name: str
+    num_pages: int
+    needs_pass: bool
+
 
 class SignatureBox(TypedDict):
     id: str
@@ -18,182 +99,248 @@ class SignatureBox(TypedDict):
     w: float
     h: float
     page: int
-    signature_svg: str
-    signature_data_url: str
+    # Blob reference of the signature SVG, "" while unsigned.
+    signature_ref: str
 
 
 class PDFState(rx.State):
-    """State for managing PDF document interactions."""
-
-    uploaded_filename: str = ""
-    is_uploading: bool = False
+    """State for managing PDF document interactions.
+
+    Holds only what every part of the page needs about the active document.
+    The viewer, boxes, signing, upload and export each have a substate, so an
+    event loads and stores this state and its own substate, not the others.
+    """
+
+    # File as uploaded.
+    _uploaded_filename: str = ""
+    # File renders and exports open: the upload, or its normalised copy.
+    _source_filename: str = ""
+    _document_hash: str = ""
     has_pdf: bool = False
     current_page: int = 1
     num_pages: int = 1
+    render_error: str = ""
+
+    def _emit_interaction_log(self, message: str):
+        logging.getLogger("interaction").info(message)
+        return rx.call_script(f"console.log({json.dumps(message)})")
+
+    @rx.var
+    def pdf_url(self) -> str:
+        """Get the URL of the PDF the viewer should load."""
+        if not self._source_filename:
+            return ""
+        api_url = get_config().api_url.rstrip("/")
+        return f"{api_url}/api/files/{quote(self._source_filename)}"
+
+
+class ViewerState(PDFState):
+    """Page navigation, zoom and rendering of the active document."""
+
     zoom_level: float = 1.0
     scale_percent: int = 100
-    signature_boxes: list[SignatureBox] = []
-    selected_box_id: str = ""
-    is_signing: bool = False
     is_rendering: bool = False
-    render_error: str = ""
     page_image_filename: str = ""
     page_image_width: int = 0
     page_image_height: int = 0
-    signed_filename: str = ""
-    file_token: str = ""
-    signature_pad_width: int = 520
-    signature_pad_height: int = 220
-
-    # Draw Box State
-    is_drawing_box: bool = False
-    drawing_start_x: float = 0
-    drawing_start_y: float = 0
-    drawing_current_x: float = 0
-    drawing_current_y: float = 0
-
-    @rx.event
-    def toggle_drawing_mode(self):
-        """Toggle the signature box drawing mode."""
-        self.is_drawing_box = not self.is_drawing_box
-        if not self.is_drawing_box:
-            # clear state if cancelled
-            self.drawing_start_x = 0
-            self.drawing_start_y = 0
-            self.drawing_current_x = 0
-            self.drawing_current_y = 0
-
-    def start_drawing_box(self, client_x: float, client_y: float):
-        """Start drawing a box."""
-        self.drawing_start_x = client_x
-        self.drawing_start_y = client_y
-        self.drawing_current_x = client_x
-        self.drawing_current_y = client_y
-
-    def update_drawing_box(self, client_x: float, client_y: float):
-        """Update drawing box coordinates."""
-        if self.is_drawing_box:
-            self.drawing_current_x = client_x
-            self.drawing_current_y = client_y
-
-    def end_drawing_box(self):
-        """End drawing and request container rect for saving."""
-        if not self.is_drawing_box:
-            return
-        
-        # Only process if we actually dragged somewhere
-        if abs(self.drawing_current_x - self.drawing_start_x) < 5 or abs(self.drawing_current_y - self.drawing_start_y) < 5:
-            # Treat as click or tiny drag - ignore or maybe exit mode?
-            # self.is_drawing_box = False # Keep mode on for multiple boxes? User preference.
+    # The page image is the low-resolution first pass of a progressive render.
+    page_image_is_draft: bool = False
+    # "server" (PyMuPDF PNGs) or "client" (PDF.js in the browser).
+    render_mode: str = DEFAULT_RENDER_MODE
+    # Bumped on every navigation; renders for older versions are discarded.
+    _render_version: int = 0
+
+    async def _apply_page_layout(self, page_index: int):
+        """Size the page placeholder from the metadata index before rendering."""
+        info = await get_document_info(self._uploaded_filename)
+        if info is None or not 0 < page_index <= len(info["pages"]):
             return
+        width, height = page_size(info, page_index - 1)
+        self.page_image_width = math.ceil(width * PREVIEW_SCALE)
+        self.page_image_height = math.ceil(height * PREVIEW_SCALE)
+
+    async def _request_render(self, settle: bool = False):
+        """Supersede any in-flight render and schedule one for the current page.
+
+        With ``settle`` (page changes) a render that is still pending defers
+        the new one until navigation pauses; otherwise it starts right away.
+        """
+        # A draft on screen means the full pass of the last render is pending.
+        settle = settle and (self.is_rendering or self.page_image_is_draft)
+        self._render_version += 1
+        self.is_rendering = True
+        self.render_error = ""
+        await self._apply_page_layout(self.current_page)
+        if self.render_mode == "client":
+            return rx.call_script(
+                f"window.renderPdfPage({json.dumps(self.pdf_url)}, "
+                f"{self.current_page}, {PREVIEW_SCALE}, 'pdf-client-canvas')"
+            )
+        return ViewerState.render_current_page(self._render_version, settle)
+
+    @rx.event(background=True)
+    async def render_current_page(self, version: int, settle: bool):
+        """Publish a quick draft of the current page, then the full image.
+
+        With ``settle`` (a page change while the last render was pending)
+        nothing is rendered until navigation has paused, so pages the user
+        clicks through get neither pass. Either pass is skipped
+        or discarded once a newer render has been requested. Pages any worker
+        has already rendered are published at full quality straight away.
+        """
+        if settle:
+            await asyncio.sleep(RENDER_SETTLE_SECONDS)
+        async with self:
+            if version != self._render_version:
+                return
+            page_number = self.current_page
+            file_path = rx.get_upload_dir() / self._source_filename
+            document_hash = self._document_hash
+        full_path = rx.get_upload_dir() / render_image_name(document_hash, page_number)
+        cached = await run_io("render-cache", lookup_render, full_path, PREVIEW_SCALE)
+        for draft in (False,) if cached else (True, False):
+            if not draft and not cached:
+                async with self:
+                    # Navigated on while the draft was shown: skip the full pass.
+                    if version != self._render_version:
+                        return
+            image_name = render_image_name(document_hash, page_number, draft)
+            try:
+                width, height, scale = cached or await render_once(
+                    file_path,
+                    page_number,
+                    rx.get_upload_dir() / image_name,
+                    DRAFT_SCALE if draft else PREVIEW_SCALE,
+                )
+            except Exception as e:
+                logging.exception("Error rendering PDF preview")
+                async with self:
+                    if version == self._render_version:
+                        self.render_error = str(e)
+                        self.is_rendering = False
+                return
+            async with self:
+                # A newer navigation owns the viewer now; drop this result.
+                if version != self._render_version:
+                    return
+                self.page_image_filename = image_name
+                self.page_image_is_draft = draft
+                self.is_rendering = False
+                if not draft or not self.page_image_width:
+                    # Size the layout as if the page was rendered at full
+                    # scale; drafts and budget-limited renders are stretched.
+                    self.page_image_width = math.ceil(width * PREVIEW_SCALE / scale)
+                    self.page_image_height = math.ceil(height * PREVIEW_SCALE / scale)
 
-        # Execute JS to get the container's bounding rect
-        yield rx.call_script(
-            "document.getElementById('pdf-image-container').getBoundingClientRect()",
-            callback=PDFState.save_box_with_rect
-        )
+    @rx.event
+    def set_zoom(self, value: list[int]):
+        """Set zoom level from slider."""
+        self.scale_percent = value[0]
+        self.zoom_level = value[0] / 100.0
 
-    def save_box_with_rect(self, rect: dict):
-        """Calculate relative coordinates and save the box."""
-        if not rect:
-            return
+    @rx.event
+    def zoom_in(self):
+        """Increment zoom level."""
+        if self.scale_percent < 300:
+            self.scale_percent += 10
+            self.zoom_level = self.scale_percent / 100.0
 
-        # Container Rect
-        c_left = rect["left"]
-        c_top = rect["top"]
-        c_width = rect["width"]
-        c_height = rect["height"]
-
-        # Box Screen Coords
-        # Use min/max to handle drawing in any direction
-        b_left = min(self.drawing_start_x, self.drawing_current_x)
-        b_top = min(self.drawing_start_y, self.drawing_current_y)
-        b_width = abs(self.drawing_current_x - self.drawing_start_x)
-        b_height = abs(self.drawing_current_y - self.drawing_start_y)
-
-        # Convert to Relative %
-        # Relative X = (BoxScreenLeft - ContainerScreenLeft) / ContainerWidth
-        rel_x = (b_left - c_left) / c_width * 100
-        rel_y = (b_top - c_top) / c_height * 100
-        rel_w = b_width / c_width * 100
-        rel_h = b_height / c_height * 100
-
-        # Save
-        new_id = "".join(random.choices(string.ascii_letters + string.digits, k=6))
-        new_box = {
-            "id": new_id,
-            "x": rel_x,
-            "y": rel_y,
-            "w": rel_w,
-            "h": rel_h,
-            "page": self.current_page,
-            "signature_svg": "",
-            "signature_data_url": "",
-        }
-        self.signature_boxes.append(new_box)
-        
-        # Reset current drawing state but stay in draw mode? 
-        # Usually easier to exit draw mode to avoid accidental clicks
-        self.is_drawing_box = False
-        self.drawing_start_x = 0
-        self.drawing_start_y = 0
-        self.drawing_current_x = 0
-        self.drawing_current_y = 0
+    @rx.event
+    def zoom_out(self):
+        """Decrement zoom level."""
+        if self.scale_percent > 25:
+            self.scale_percent -= 10
+            self.zoom_level = self.scale_percent / 100.0
 
-    def _emit_interaction_log(self, message: str):
-        logging.getLogger("interaction").info(message)
-        return rx.call_script(f"console.log({json.dumps(message)})")
+    @rx.event
+    async def next_page(self):
+        """Navigate to next page."""
+        if self.current_page < self.num_pages:
+            self.current_page += 1
+            return await self._request_render(settle=True)
 
     @rx.event
-    def open_signing_modal(self, box_id: str):
-        """Open the signature pad for a specific box."""
-        self.selected_box_id = box_id
-        self.is_signing = True
-        yield self._emit_interaction_log(
-            "signature:open "
-            f"box_id={box_id} page={self.current_page} zoom={self.zoom_level:.2f}"
-        )
-        yield rx.call_script(
-            "setTimeout(function(){ window.initSignaturePad('signature-canvas'); }, 150)"
-        )
+    async def prev_page(self):
+        """Navigate to previous page."""
+        if self.current_page > 1:
+            self.current_page -= 1
+            return await self._request_render(settle=True)
 
     @rx.event
-    def close_signing_modal(self):
-        """Close the signature pad modal."""
-        self.is_signing = False
-        self.selected_box_id = ""
-        return self._emit_interaction_log("signature:close")
+    async def set_render_mode(self, mode: str):
+        """Switch between server-side and in-browser page rendering."""
+        if mode not in RENDER_MODES or mode == self.render_mode:
+            return
+        self.render_mode = mode
+        if mode == "server":
+            yield rx.call_script("window.releasePdfDocument()")
+        if self.has_pdf and self._uploaded_filename:
+            yield await self._request_render()
 
     @rx.event
-    def apply_signature_data(self, svg_string: str):
-        """Apply signature SVG from signature_pad to the selected box."""
-        if not svg_string:
-            # Canvas was empty – just close without changing existing signature
-            self.is_signing = False
-            self.selected_box_id = ""
+    def report_client_render(self, data: str):
+        """Apply the outcome of a PDF.js page render reported by the browser."""
+        try:
+            result = json.loads(data)
+        except ValueError:
             return
-        # Build data-URL for display (stretch to fill box)
-        svg_display = svg_string.replace(
-            "<svg ", '<svg preserveAspectRatio="none" ', 1
-        )
-        data_url = "data:image/svg+xml;base64," + base64.b64encode(
-            svg_display.encode("utf-8")
-        ).decode("ascii")
-        for box in self.signature_boxes:
-            if box["id"] == self.selected_box_id:
-                box["signature_svg"] = svg_string
-                box["signature_data_url"] = data_url
-                break
-        self.signature_boxes = list(self.signature_boxes)
-        self.is_signing = False
-        self.selected_box_id = ""
-        return self._emit_interaction_log("signature:apply (svg)")
+        if self.render_mode != "client" or result.get("page") != self.current_page:
+            return
+        if result.get("numPages"):
+            self.num_pages = int(result["numPages"])
+        if result.get("width") and result.get("height"):
+            self.page_image_width = int(result["width"])
+            self.page_image_height = int(result["height"])
+        self.render_error = result.get("error", "")
+        self.is_rendering = False
+
+    @rx.var
+    def page_image_url(self) -> str:
+        """Get the URL for the rendered PDF page image."""
+        if not self.page_image_filename:
+            return ""
+        api_url = get_config().api_url.rstrip("/")
+        return f"{api_url}/api/files/{self.page_image_filename}"
+
+    @rx.var
+    def page_image_width_px(self) -> str:
+        """Get the rendered page width in px."""
+        return f"{self.page_image_width}px"
+
+    @rx.var
+    def page_image_height_px(self) -> str:
+        """Get the rendered page height in px."""
+        return f"{self.page_image_height}px"
+
+    @rx.var
+    def page_image_scaled_width_px(self) -> str:
+        """Get the scaled page width in px."""
+        return f"{self.page_image_width * self.zoom_level:.2f}px"
+
+    @rx.var
+    def page_image_scaled_height_px(self) -> str:
+        """Get the scaled page height in px."""
+        return f"{self.page_image_height * self.zoom_level:.2f}px"
+
+
+class BoxesState(PDFState):
+    """Signature boxes of the active document and drawing new ones."""
+
+    signature_boxes: list[SignatureBox] = []
+
+    # Draw Box State
+    is_drawing_box: bool = False
+
+    @rx.var
+    def signature_blobs_url(self) -> str:
+        """Get the base URL signature images are served from."""
+        api_url = get_config().api_url.rstrip("/")
+        return f"{api_url}/api/blobs"
 
     @rx.event
-    def clear_signature_pad(self):
-        """Clear the signature pad canvas."""
-        yield self._emit_interaction_log("signature:clear")
-        yield rx.call_script("window.clearSignaturePad()")
+    def toggle_drawing_mode(self):
+        """Toggle the signature box drawing mode."""
+        self.is_drawing_box = not self.is_drawing_box
 
     @rx.event
     def add_box(self, data: str):
@@ -210,8 +357,7 @@ class PDFState(rx.State):
                 "w": box_data["w"],
                 "h": box_data["h"],
                 "page": self.current_page,
-                "signature_svg": "",
-                "signature_data_url": "",
+                "signature_ref": "",
             }
             self.signature_boxes.append(new_box)
             self.is_drawing_box = False
@@ -232,315 +378,439 @@ class PDFState(rx.State):
         """Remove all signature boxes."""
         self.signature_boxes = []
 
-    @rx.event
-    def set_rendering(self, is_rendering: bool):
-        """Update rendering status from the JS side."""
-        self.is_rendering = is_rendering
 
-    @rx.event
-    def set_render_error(self, message: str):
-        """Update render error message from the JS side."""
-        self.render_error = message
+class SigningState(PDFState):
+    """The signature pad modal."""
 
-
-    def _render_page_image(self, page_index: int, file_path):
-        """Render a specific PDF page to an image in the upload directory."""
-        self.is_rendering = True
-        self.render_error = ""
-        doc = None
-        try:
-            doc = fitz.open(file_path)
-            self.num_pages = doc.page_count
-            page = doc.load_page(page_index - 1)
-            pix = page.get_pixmap(matrix=fitz.Matrix(2, 2))
-            image_name = f"{self.file_token}_page{page_index}.png"
-            image_path = rx.get_upload_dir() / image_name
-            pix.save(image_path)
-            self.page_image_filename = image_name
-            self.page_image_width = int(pix.width)
-            self.page_image_height = int(pix.height)
-        except Exception as e:
-            self.render_error = str(e)
-            logging.exception("Error rendering PDF preview")
-        finally:
-            if doc is not None:
-                try:
-                    doc.close()
-                except Exception:
-                    pass
-            self.is_rendering = False
+    selected_box_id: str = ""
+    is_signing: bool = False
+    signature_pad_width: int = 520
+    signature_pad_height: int = 220
 
     @rx.event
-    async def handle_upload(self, files: list[rx.UploadFile]):
-        """Handle PDF file upload."""
-        self.is_uploading = True
-        self.is_rendering = False
-        self.render_error = ""
-        self.page_image_filename = ""
-        self.page_image_width = 0
-        self.page_image_height = 0
-        self.signed_filename = ""
-        self.file_token = ""
-        yield
-        for file in files:
-            if not file.name.lower().endswith(".pdf"):
-                yield rx.toast("Please upload a valid PDF file.")
-                continue
-            upload_data = await file.read()
-            upload_dir = rx.get_upload_dir()
-            upload_dir.mkdir(parents=True, exist_ok=True)
-            unique_name = (
-                "".join(random.choices(string.ascii_letters + string.digits, k=8))
-                + "_"
-                + file.name
-            )
-            file_path = upload_dir / unique_name
-            with file_path.open("wb") as f:
-                f.write(upload_data)
-            self.uploaded_filename = unique_name
-            self.file_token = "".join(
-                random.choices(string.ascii_letters + string.digits, k=12)
-            )
-            self.has_pdf = True
-            self.current_page = 1
-            self.signature_boxes = []
-            self.is_rendering = True
-            self.render_error = ""
-            yield
-            self._render_page_image(1, file_path)
-            yield rx.toast(f"Uploaded: {file.name}", duration=3000)
-        self.is_uploading = False
-        self.is_rendering = False
+    def open_signing_modal(self, box_id: str):
+        """Open the signature pad for a specific box."""
+        self.selected_box_id = box_id
+        self.is_signing = True
+        yield self._emit_interaction_log(
+            f"signature:open box_id={box_id} page={self.current_page}"
+        )
+        yield rx.call_script(
+            "setTimeout(function(){ window.initSignaturePad('signature-canvas'); }, 150)"
+        )
 
     @rx.event
-    def set_zoom(self, value: list[int]):
-        """Set zoom level from slider."""
-        self.scale_percent = value[0]
-        self.zoom_level = value[0] / 100.0
+    def close_signing_modal(self):
+        """Close the signature pad modal."""
+        self.is_signing = False
+        self.selected_box_id = ""
+        return self._emit_interaction_log("signature:close")
 
     @rx.event
-    def zoom_in(self):
-        """Increment zoom level."""
-        if self.scale_percent < 300:
-            self.scale_percent += 10
-            self.zoom_level = self.scale_percent / 100.0
+    async def apply_signature_data(self, svg_string: str):
+        """Apply signature SVG from signature_pad to the selected box.
+
+        The SVG goes to the blob store; the box keeps only its reference.
+        """
+        if not svg_string:
+            # Canvas was empty – just close without changing existing signature
+            self.is_signing = False
+            self.selected_box_id = ""
+            return
+        # Stretch to fill the box when displayed; export only reads the viewBox.
+        svg_display = svg_string.replace(
+            "<svg ", '<svg preserveAspectRatio="none" ', 1
+        )
+        ref = await put_blob(svg_display.encode("utf-8"))
+        boxes = await self.get_state(BoxesState)
+        for box in boxes.signature_boxes:
+            if box["id"] == self.selected_box_id:
+                box["signature_ref"] = ref
+                break
+        boxes.signature_boxes = list(boxes.signature_boxes)
+        self.is_signing = False
+        self.selected_box_id = ""
+        return self._emit_interaction_log("signature:apply (svg)")
 
     @rx.event
-    def zoom_out(self):
-        """Decrement zoom level."""
-        if self.scale_percent > 25:
-            self.scale_percent -= 10
-            self.zoom_level = self.scale_percent / 100.0
+    def clear_signature_pad(self):
+        """Clear the signature pad canvas."""
+        yield self._emit_interaction_log("signature:clear")
+        yield rx.call_script("window.clearSignaturePad()")
+
+
+class ExportState(PDFState):
+    """Export options and the last signed PDF of the active document."""
+
+    export_profile: str = DEFAULT_EXPORT_PROFILE
+    export_mode: str = DEFAULT_EXPORT_MODE
+    # Also keep each signed PDF on disk, so its download outlives the
+    # in-memory buffer and the upload (off: served from memory only).
+    retain_signed_copy: bool = False
+    is_exporting: bool = False
+    _export_id: str = ""
+    _export_size_bytes: int = 0
+    _export_save_ms: float = 0.0
+    # Save profile that produced the last export's stats.
+    _export_profile: str = ""
 
     @rx.event
-    def next_page(self):
-        """Navigate to next page."""
-        if self.current_page < self.num_pages:
-            self.current_page += 1
-            upload_dir = rx.get_upload_dir()
-            file_path = upload_dir / self.uploaded_filename
-            if file_path.exists():
-                self._render_page_image(self.current_page, file_path)
+    def set_export_profile(self, profile: str):
+        """Select the save profile used for the next export."""
+        if profile in EXPORT_PROFILES:
+            self.export_profile = profile
 
     @rx.event
-    def prev_page(self):
-        """Navigate to previous page."""
-        if self.current_page > 1:
-            self.current_page -= 1
-            upload_dir = rx.get_upload_dir()
-            file_path = upload_dir / self.uploaded_filename
-            if file_path.exists():
-                self._render_page_image(self.current_page, file_path)
+    def set_export_mode(self, mode: str):
+        """Select how the next export writes signatures (drawn or annotated)."""
+        if mode in EXPORT_MODES:
+            self.export_mode = mode
 
     @rx.event
-    def update_page_count(self, count: int):
-        """Update total pages from JS side."""
-        self.num_pages = count
-
-    def _parse_signature_svg(self, svg_string: str) -> dict:
-        """Parse signature_pad SVG into Bézier segments and dots for PDF export."""
-        paths: list[dict] = []
-        circles: list[dict] = []
-        # Extract viewBox to know the coordinate system
-        vb_m = re.search(r'viewBox="([^"]*)"', svg_string)
-        vb_w = float(self.signature_pad_width)
-        vb_h = float(self.signature_pad_height)
-        if vb_m:
-            parts = vb_m.group(1).split()
-            if len(parts) == 4:
-                try:
-                    vb_w = float(parts[2])
-                    vb_h = float(parts[3])
-                except ValueError:
-                    pass
-        # Extract <path d="M sx,sy C c1x,c1y c2x,c2y ex,ey" stroke-width="W" ...>
-        for m in re.finditer(r"<path\s([^>]*?)/?>", svg_string):
-            attrs = m.group(1)
-            d_m = re.search(r'd="([^"]*)"', attrs)
-            w_m = re.search(r'stroke-width="([^"]*)"', attrs)
-            if not (d_m and w_m):
-                continue
-            tokens = d_m.group(1).strip().split()
-            width = float(w_m.group(1))
-            if len(tokens) >= 6 and tokens[0] == "M" and tokens[2] == "C":
-                try:
-                    start = [float(v) for v in tokens[1].split(",")]
-                    c1 = [float(v) for v in tokens[3].split(",")]
-                    c2 = [float(v) for v in tokens[4].split(",")]
-                    end = [float(v) for v in tokens[5].split(",")]
-                    paths.append(
-                        {"start": start, "c1": c1, "c2": c2, "end": end, "width": width}
-                    )
-                except (ValueError, IndexError):
-                    continue
-        # Extract <circle r="R" cx="X" cy="Y" ...>
-        for m in re.finditer(r"<circle\s([^>]*?)/?>", svg_string):
-            attrs = m.group(1)
-            r_m = re.search(r'\br="([^"]*)"', attrs)
-            cx_m = re.search(r'cx="([^"]*)"', attrs)
-            cy_m = re.search(r'cy="([^"]*)"', attrs)
-            if r_m and cx_m and cy_m:
-                try:
-                    circles.append(
-                        {
-                            "cx": float(cx_m.group(1)),
-                            "cy": float(cy_m.group(1)),
-                            "r": float(r_m.group(1)),
-                        }
-                    )
-                except ValueError:
-                    continue
-        return {"paths": paths, "circles": circles, "viewBox_w": vb_w, "viewBox_h": vb_h}
+    def toggle_retain_signed_copy(self):
+        """Toggle keeping a copy of each signed PDF on disk."""
+        self.retain_signed_copy = not self.retain_signed_copy
 
     @rx.event
     def export_signed_pdf(self):
-        """Export a signed PDF with signature overlays applied."""
-        if not self.uploaded_filename:
+        """Start exporting a signed PDF with signature overlays applied."""
+        if not self._uploaded_filename or self.is_exporting:
             return
+        self.is_exporting = True
+        return ExportState.run_export
 
-        upload_dir = rx.get_upload_dir()
-        pdf_path = upload_dir / self.uploaded_filename
-        if not pdf_path.exists():
-            self.render_error = "Original PDF not found."
-            return
+    @rx.event(background=True)
+    async def run_export(self):
+        """Build the signed PDF, holding the state lock only to read and store.
 
-        try:
-            doc = fitz.open(pdf_path)
-            pad_w = float(self.signature_pad_width) or 1.0
-            pad_h = float(self.signature_pad_height) or 1.0
-
-            for box in self.signature_boxes:
-                svg_string = box.get("signature_svg", "")
-                if not svg_string:
-                    continue
-                page_index = int(box.get("page", 1)) - 1
-                if page_index < 0 or page_index >= doc.page_count:
-                    continue
-                page = doc.load_page(page_index)
-                page_rect = page.rect
-                bx = page_rect.width * (float(box["x"]) / 100.0)
-                by = page_rect.height * (float(box["y"]) / 100.0)
-                bw = page_rect.width * (float(box["w"]) / 100.0)
-                bh = page_rect.height * (float(box["h"]) / 100.0)
-                rect = fitz.Rect(bx, by, bx + bw, by + bh)
-
-                parsed = self._parse_signature_svg(svg_string)
-                svg_w = parsed["viewBox_w"] or pad_w
-                svg_h = parsed["viewBox_h"] or pad_h
-                scale_x = rect.width / svg_w
-                scale_y = rect.height / svg_h
-                scale_w = min(scale_x, scale_y)  # keep stroke width proportional
-
-                ink_color = (0.067, 0.094, 0.153)  # #111827
-
-                shape = page.new_shape()
-                for pd in parsed["paths"]:
-                    p1 = fitz.Point(
-                        rect.x0 + pd["start"][0] * scale_x,
-                        rect.y0 + pd["start"][1] * scale_y,
-                    )
-                    p2 = fitz.Point(
-                        rect.x0 + pd["c1"][0] * scale_x,
-                        rect.y0 + pd["c1"][1] * scale_y,
-                    )
-                    p3 = fitz.Point(
-                        rect.x0 + pd["c2"][0] * scale_x,
-                        rect.y0 + pd["c2"][1] * scale_y,
-                    )
-                    p4 = fitz.Point(
-                        rect.x0 + pd["end"][0] * scale_x,
-                        rect.y0 + pd["end"][1] * scale_y,
-                    )
-                    shape.draw_bezier(p1, p2, p3, p4)
-                    shape.finish(
-                        color=ink_color,
-                        width=pd["width"] * scale_w,
-                        closePath=False,
-                        lineCap=1,   # round
-                        lineJoin=1,  # round
-                    )
-                for cd in parsed["circles"]:
-                    cx = rect.x0 + cd["cx"] * scale_x
-                    cy = rect.y0 + cd["cy"] * scale_y
-                    r = cd["r"] * scale_w
-                    shape.draw_circle(fitz.Point(cx, cy), max(r, 0.5))
-                    shape.finish(fill=ink_color, closePath=True)
-                shape.commit()
-
-            signed_name = f"{self.file_token}_signed.pdf"
-            signed_path = upload_dir / signed_name
-            doc.save(signed_path)
-            self.signed_filename = signed_name
-            self.render_error = ""
-        except Exception as e:
-            self.render_error = str(e)
-            logging.exception("Error exporting signed PDF")
-        finally:
+        The sandboxed save can take up to ``JOB_TIMEOUT_SECONDS``; with Redis
+        the session's lock must not be held, let alone expire, meanwhile.
+        """
+        with track_io_wait() as io_wait:
             try:
-                doc.close()
-            except Exception:
-                pass
+                message = await self._export_signed_pdf(io_wait)
+            except Exception as e:
+                logging.exception("Error exporting signed PDF")
+                message = None
+                async with self:
+                    self.render_error = str(e)
+            async with self:
+                self.is_exporting = False
+        if message:
+            return self._emit_interaction_log(message)
+
+    async def _export_signed_pdf(self, io_wait: IOWait) -> str | None:
+        """Run an export, charging its storage wait to ``io_wait``.
+
+        Returns the interaction log line; a result for a document that is no
+        longer active is dropped.
+        """
+        async with self:
+            uploaded_filename = self._uploaded_filename
+            source_filename = self._source_filename
+            document_hash = self._document_hash
+            boxes = (await self.get_state(BoxesState)).signature_boxes
+            pad = await self.get_state(SigningState)
+            pad_w = float(pad.signature_pad_width) or 1.0
+            pad_h = float(pad.signature_pad_height) or 1.0
+            options = {
+                "tolerance": DEFAULT_STROKE_TOLERANCE_PT,
+                "width_step": DEFAULT_WIDTH_STEP_PT,
+                "profile": self.export_profile,
+                "mode": self.export_mode,
+            }
+            retain = self.retain_signed_copy
+        pdf_path = rx.get_upload_dir() / source_filename
+        if await stat_file(pdf_path) is None:
+            async with self:
+                self.render_error = "Original PDF not found."
+            return None
+
+        svgs = {"": ""}
+        for box in boxes:
+            if box["signature_ref"] not in svgs:
+                svg = await get_blob(box["signature_ref"])
+                svgs[box["signature_ref"]] = svg.decode("utf-8")
+        spec = {
+            "source": source_filename,
+            "boxes": [
+                {
+                    **{key: box[key] for key in ("x", "y", "w", "h", "page")},
+                    "signature_svg": svgs[box["signature_ref"]],
+                }
+                for box in boxes
+            ],
+            "pad_w": pad_w,
+            "pad_h": pad_h,
+            **options,
+        }
+        if not document_hash:
+            info = await get_document_info(uploaded_filename)
+            if info is None:
+                async with self:
+                    self.render_error = "Could not read the original PDF."
+                return None
+            document_hash = info["sha256"]
+        export_id = export_fingerprint(document_hash, spec)
+        stats = await run_io(
+            "export-spec", cached_export_stats, export_id, source_filename
+        )
+        cached = stats is not None
+        if not cached:
+            data, stats = await asyncio.to_thread(
+                run_sandboxed, render_signed, pdf_path, spec
+            )
+            await run_io("export-spec", register_export, export_id, spec, data, stats)
+        # A cached export is loaded, or regenerated in the sandbox, to retain it.
+        retained = not retain or await asyncio.to_thread(
+            retain_export, export_id, None if cached else data
+        )
+        async with self:
+            # The user switched documents meanwhile; the export stays cached.
+            if self._uploaded_filename != uploaded_filename:
+                return None
+            self._document_hash = document_hash
+            self._export_id = export_id
+            self._export_size_bytes = stats["bytes"]
+            self._export_save_ms = round(stats["save_ms"], 1)
+            self._export_profile = stats["profile"]
+            self.render_error = (
+                "" if retained else "Could not keep a copy of the signed PDF."
+            )
+        return (
+            f"export:{'cached' if cached else 'save'} profile={stats['profile']} "
+            f"mode={stats['mode']} "
+            f"bytes={stats['bytes']} save_ms={stats['save_ms']:.1f} "
+            f"io_ms={io_wait.ms:.1f}"
+        )
 
     @rx.var
-    def pdf_url(self) -> str:
-        """Get the URL for the uploaded PDF."""
-        if not self.uploaded_filename:
+    def signed_pdf_url(self) -> str:
+        """Get the download URL for the signed PDF, streamed from memory."""
+        if not self._export_id:
             return ""
         api_url = get_config().api_url.rstrip("/")
-        return f"{api_url}/_upload/{self.uploaded_filename}"
+        download_name = f"{Path(self._uploaded_filename).stem}_signed.pdf"
+        return f"{api_url}/api/signed/{self._export_id}/{quote(download_name)}"
 
     @rx.var
-    def page_image_url(self) -> str:
-        """Get the URL for the rendered PDF page image."""
-        if not self.page_image_filename:
+    def export_stats_label(self) -> str:
+        """Get a short summary of the last export's size and save time."""
+        if not self._export_id:
             return ""
-        api_url = get_config().api_url.rstrip("/")
-        return f"{api_url}/_upload/{self.page_image_filename}"
+        return (
+            f"{self._export_size_bytes / 1024:.1f} KB · "
+            f"saved in {self._export_save_ms:.0f} ms ({self._export_profile})"
+        )
 
-    @rx.var
-    def signed_pdf_url(self) -> str:
-        """Get the URL for the signed PDF."""
-        if not self.signed_filename:
-            return ""
-        api_url = get_config().api_url.rstrip("/")
-        return f"{api_url}/_upload/{self.signed_filename}"
 
-    @rx.var
-    def page_image_width_px(self) -> str:
-        """Get the rendered page width in px."""
-        return f"{self.page_image_width}px"
+class UploadState(PDFState):
+    """Uploading documents and switching between a session's documents."""
 
-    @rx.var
-    def page_image_height_px(self) -> str:
-        """Get the rendered page height in px."""
-        return f"{self.page_image_height}px"
+    is_uploading: bool = False
+    # Documents open in this session, in upload order.
+    documents: list[DocumentEntry] = []
+    active_document_id: str = ""
+    # Saved DOCUMENT_FIELDS of each session document, by id.
+    _document_states: dict[str, dict] = {}
+    # Document ids, least recently used first; the last MAX_HOT_DOCUMENTS are hot.
+    _document_lru: list[str] = []
+
+    async def _document_owners(self) -> dict[str, rx.State]:
+        """Map each of DOCUMENT_FIELDS to the state to read and set it on.
+
+        Fields of PDFState can be set through any substate.
+        """
+        classes = (ViewerState, BoxesState, ExportState)
+        # In background events get_state returns proxies, so match by class.
+        states = {cls: await self.get_state(cls) for cls in classes}
+        return {
+            name: states[
+                next(cls for cls in classes if name in cls.vars or name in cls.backend_vars)
+            ]
+            for name in DOCUMENT_FIELDS
+        }
 
-    @rx.var
-    def page_image_scaled_width_px(self) -> str:
-        """Get the scaled page width in px."""
-        return f"{self.page_image_width * self.zoom_level:.2f}px"
+    async def _save_active_document(self):
+        """Store the active document's fields in its session slot."""
+        if self.active_document_id not in self._document_states:
+            return
+        owners = await self._document_owners()
+        snapshot = {
+            name: copy.deepcopy(getattr(owners[name], name))
+            for name in DOCUMENT_FIELDS
+        }
+        self._document_states = {
+            **self._document_states,
+            self.active_document_id: snapshot,
+        }
 
-    @rx.var
-    def page_image_scaled_height_px(self) -> str:
-        """Get the scaled page height in px."""
-        return f"{self.page_image_height * self.zoom_level:.2f}px"
\ No newline at end of file
+    async def _load_document(self, fields: dict) -> ViewerState:
+        """Set the active document's fields, superseding in-flight renders."""
+        owners = await self._document_owners()
+        for name, value in fields.items():
+            setattr(owners[name], name, copy.deepcopy(value))
+        viewer = await self.get_state(ViewerState)
+        # Renders still in flight belong to the previous document.
+        viewer._render_version += 1
+        viewer.is_rendering = False
+        return viewer
+
+    async def _activate_document(self, document_id: str) -> ViewerState:
+        """Make a session document active and mark it most recently used.
+
+        Documents falling out of the hot set keep their pages and boxes but
+        drop their rendered page, which is rendered again when reopened.
+        """
+        viewer = await self._load_document(self._document_states[document_id])
+        self.active_document_id = document_id
+        self.has_pdf = True
+        lru = [d for d in self._document_lru if d != document_id] + [document_id]
+        states = dict(self._document_states)
+        for cold in lru[:-MAX_HOT_DOCUMENTS]:
+            if states[cold]["page_image_filename"]:
+                states[cold] = {**states[cold], "page_image_filename": ""}
+        self._document_lru = lru
+        self._document_states = states
+        return viewer
+
+    @rx.event
+    async def handle_upload(self, files: list[rx.UploadFile]):
+        """Store uploaded PDFs, then index each as a session document.
+
+        Upload handlers cannot run in the background, so this one only writes
+        the files; the sandboxed indexing runs in ``index_uploads`` without
+        holding the session's state lock.
+        """
+        self.is_uploading = True
+        yield
+        uploads = []
+        for file in files:
+            if not file.name.lower().endswith(".pdf"):
+                yield rx.toast("Please upload a valid PDF file.")
+                continue
+            if len(self.documents) + len(uploads) >= MAX_SESSION_DOCUMENTS:
+                yield rx.toast("Close a document before opening another one.")
+                break
+            upload_data = await file.read()
+            unique_name = (
+                "".join(random.choices(string.ascii_letters + string.digits, k=8))
+                + "_"
+                + file.name
+            )
+            try:
+                await write_bytes(rx.get_upload_dir() / unique_name, upload_data)
+            except Exception as e:
+                logging.exception("Error storing uploaded PDF")
+                yield rx.toast(f"Could not store {file.name}: {e}")
+                continue
+            uploads.append({"filename": unique_name, "name": file.name})
+        if uploads:
+            yield UploadState.index_uploads(uploads)
+        else:
+            self.is_uploading = False
+
+    @rx.event(background=True)
+    async def index_uploads(self, uploads: list[dict]):
+        """Index stored uploads and add each as a session document."""
+        for upload in uploads:
+            unique_name, name = upload["filename"], upload["name"]
+            try:
+                with track_io_wait() as io_wait:
+                    upload_data = await read_bytes(rx.get_upload_dir() / unique_name)
+                    info = await asyncio.to_thread(
+                        index_document, unique_name, upload_data
+                    )
+            except Exception as e:
+                logging.exception("Error reading uploaded PDF")
+                async with self:
+                    if not self.has_pdf:
+                        self.render_error = f"Could not read {name}: {e}"
+                yield rx.toast(f"Could not read {name}: {e}")
+                continue
+            document_id = "".join(
+                random.choices(string.ascii_letters + string.digits, k=8)
+            )
+            async with self:
+                await self._save_active_document()
+                self._document_states = {
+                    **self._document_states,
+                    document_id: {
+                        **copy.deepcopy(BLANK_DOCUMENT),
+                        "_uploaded_filename": unique_name,
+                        "_source_filename": resolve_source(info),
+                        "_document_hash": info["sha256"],
+                        "num_pages": max(info["page_count"], 1),
+                        "render_error": (
+                            "This PDF is password-protected."
+                            if info["needs_pass"]
+                            else ""
+                        ),
+                    },
+                }
+                self.documents.append(
+                    {
+                        "id": document_id,
+                        "name": name,
+                        "num_pages": max(info["page_count"], 1),
+                        "needs_pass": info["needs_pass"],
+                    }
+                )
+                viewer = await self._activate_document(document_id)
+                render = None if info["needs_pass"] else await viewer._request_render()
+            if render is None:
+                continue
+            yield render
+            yield rx.toast(f"Uploaded: {name}", duration=3000)
+            yield self._emit_interaction_log(
+                f"upload bytes={len(upload_data)} io_ms={io_wait.ms:.1f}"
+            )
+        async with self:
+            self.is_uploading = False
+
+    async def _show_document(self, document_id: str):
+        """Activate a document and render its page unless it is still hot."""
+        viewer = await self._activate_document(document_id)
+        entry = next(d for d in self.documents if d["id"] == document_id)
+        if entry["needs_pass"]:
+            return None
+        if (
+            viewer.render_mode == "server"
+            and viewer.page_image_filename
+            and not viewer.page_image_is_draft
+            and await stat_file(rx.get_upload_dir() / viewer.page_image_filename)
+        ):
+            return self._emit_interaction_log(f"document:switch hot id={document_id}")
+        return [
+            await viewer._request_render(),
+            self._emit_interaction_log(f"document:switch cold id={document_id}"),
+        ]
+
+    @rx.event
+    async def switch_document(self, document_id: str):
+        """Show another session document where it was left."""
+        if (
+            document_id == self.active_document_id
+            or document_id not in self._document_states
+        ):
+            return
+        await self._save_active_document()
+        return await self._show_document(document_id)
+
+    @rx.event
+    async def close_document(self, document_id: str):
+        """Remove a document from the session, activating the previous one."""
+        if document_id not in self._document_states:
+            return
+        states = dict(self._document_states)
+        del states[document_id]
+        self._document_states = states
+        self._document_lru = [d for d in self._document_lru if d != document_id]
+        self.documents = [d for d in self.documents if d["id"] != document_id]
+        if document_id != self.active_document_id:
+            return
+        self.active_document_id = ""
+        if self._document_lru:
+            return await self._show_document(self._document_lru[-1])
+        await self._load_document(BLANK_DOCUMENT)
+        self.has_pdf = False
@@ -0,0 +1,91 @@
+"""Naming and HTTP caching rules for files served from the upload directory.
+
+Page renders are named after the document hash, the page and the render
+pass, so a name always refers to the same bytes and can be cached by the
+browser forever. Other uploads are served with a strong ETag and must be
+revalidated, which costs a 304 instead of a re-download.
+"""
+
+import hashlib
+import os
+import re
+from pathlib import Path
+
+import reflex as rx
+
+IMMUTABLE_CACHE_CONTROL = "private, max-age=31536000, immutable"
+REVALIDATE_CACHE_CONTROL = "private, no-cache"
+# Let cross-origin readers (PDF.js on the frontend port) detect range support.
+EXPOSE_HEADERS = "Accept-Ranges, Content-Range, Content-Length, ETag"
+
+_RENDER_NAME_RE = re.compile(r"[0-9a-f]{16}_page\d+(?:_draft)?\.png")
+_RANGE_RE = re.compile(r"bytes=(\d*)-(\d*)")
+
+
+def render_image_name(document_hash: str, page_number: int, draft: bool = False) -> str:
+    """Return the content-addressed file name of a page render."""
+    suffix = "_draft" if draft else ""
+    return f"{document_hash[:16]}_page{page_number}{suffix}.png"
+
+
+def is_content_addressed(name: str) -> bool:
+    return _RENDER_NAME_RE.fullmatch(name) is not None
+
+
+def resolve_artifact(name: str) -> Path | None:
+    """Map a requested name to a path directly inside the upload directory.
+
+    Only the name is checked; whether the file exists is up to the caller.
+    """
+    if not name or name.startswith(".") or "/" in name or "\\" in name:
+        return None
+    return rx.get_upload_dir() / name
+
+
+def artifact_etag(name: str, stat: os.stat_result) -> str:
+    """Strong ETag, identical across workers sharing the upload directory."""
+    if is_content_addressed(name):
+        return f'"{Path(name).stem}"'
+    base = f"{name}:{stat.st_size}:{stat.st_mtime_ns}"
+    return f'"{hashlib.sha256(base.encode()).hexdigest()[:32]}"'
+
+
+def cache_control(name: str) -> str:
+    if is_content_addressed(name):
+        return IMMUTABLE_CACHE_CONTROL
+    return REVALIDATE_CACHE_CONTROL
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    """Weak comparison of an If-None-Match header against ``etag``."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    candidates = (tag.strip().removeprefix("W/") for tag in if_none_match.split(","))
+    return etag.removeprefix("W/") in candidates
+
+
+def parse_byte_range(header: str | None, size: int) -> tuple[int, int] | None:
+    """Parse a single-range ``Range`` header into a half-open (start, end).
+
+    Returns None when the whole body should be sent (no header, or a form
+    this helper does not serve, such as multiple ranges) and raises
+    ValueError when the range cannot be satisfied.
+    """
+    if not header:
+        return None
+    m = _RANGE_RE.fullmatch(header.strip())
+    if m is None:
+        return None
+    first, last = m.groups()
+    if not first and not last:
+        return None
+    if not first:
+        start, end = max(0, size - int(last)), size
+    else:
+        start = int(first)
+        end = min(int(last) + 1, size) if last else size
+    if start >= size or start >= end:
+        raise ValueError(f"unsatisfiable range {header!r} for {size} bytes")
+    return start, end
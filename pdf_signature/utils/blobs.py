@@ -0,0 +1,105 @@
+"""Content-addressed store for large per-box payloads such as signature SVGs.
+
+Session state keeps only the SHA-256 reference of a blob, so its serialized
+size, and with it every state-manager round trip, stays flat however many
+signatures a session holds. Blobs are written once to the upload directory,
+shared by every worker, and served as immutable files.
+
+Sessions do not say when they stop referencing a blob, so storing, reading
+or serving a blob refreshes its mtime, and ``prune_blobs`` deletes blobs
+unused for ``BLOB_MAX_AGE_SECONDS``.
+"""
+
+import hashlib
+import os
+import re
+import time
+from pathlib import Path
+
+import reflex as rx
+
+from pdf_signature.utils.storage import run_io, stat_file, write_bytes
+
+# Blobs not stored, read or served for this long are deleted by prune_blobs.
+BLOB_MAX_AGE_SECONDS = 30 * 24 * 3600
+# A used blob's mtime is refreshed at most this often, to keep reads cheap.
+_REFRESH_SECONDS = 24 * 3600
+
+_REF_RE = re.compile(r"[0-9a-f]{64}")
+
+
+def blob_ref(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def blob_path(ref: str) -> Path | None:
+    """Map a reference to its file, or None for a malformed reference."""
+    if not _REF_RE.fullmatch(ref):
+        return None
+    return rx.get_upload_dir() / "blobs" / ref
+
+
+def _is_fresh(mtime: float) -> bool:
+    return time.time() - mtime < _REFRESH_SECONDS
+
+
+def _touch_blob(path: Path, mtime: float) -> bool:
+    """Mark a blob last modified at ``mtime`` as used.
+
+    Returns False if the blob has been pruned meanwhile.
+    """
+    if _is_fresh(mtime):
+        return True
+    try:
+        os.utime(path)
+    except FileNotFoundError:
+        return False
+    return True
+
+
+async def refresh_blob(path: Path, stat: os.stat_result) -> bool:
+    """Like ``_touch_blob``, without blocking the loop."""
+    if _is_fresh(stat.st_mtime):
+        return True
+    return await run_io("blob:touch", _touch_blob, path, stat.st_mtime)
+
+
+def _read_blob(path: Path) -> bytes:
+    with open(path, "rb") as f:
+        data = f.read()
+        mtime = os.fstat(f.fileno()).st_mtime
+    _touch_blob(path, mtime)
+    return data
+
+
+async def put_blob(data: bytes) -> str:
+    """Store ``data`` unless an identical blob exists; return its reference."""
+    ref = blob_ref(data)
+    path = blob_path(ref)
+    stat = await stat_file(path)
+    if stat is None or not await refresh_blob(path, stat):
+        await write_bytes(path, data)
+    return ref
+
+
+async def get_blob(ref: str) -> bytes:
+    path = blob_path(ref)
+    if path is None:
+        raise KeyError(ref)
+    return await run_io("read", _read_blob, path)
+
+
+def prune_blobs(max_age: float = BLOB_MAX_AGE_SECONDS) -> int:
+    """Delete blobs unused for ``max_age`` seconds; return how many."""
+    cutoff = time.time() - max_age
+    removed = 0
+    for path in (rx.get_upload_dir() / "blobs").glob("*"):
+        try:
+            if path.stat().st_mtime >= cutoff:
+                continue
+            path.unlink()
+        except FileNotFoundError:
+            # Pruned by another worker since the listing.
+            continue
+        removed += 1
+    return removed
@@ -0,0 +1,186 @@
+"""Per-document metadata index computed once at upload.
+
+Page count, page sizes and rotation, encryption and repair status and the
+file hash are recorded in a compact JSON sidecar next to the upload and kept
+in a small in-memory LRU, so viewers, layouts and exporters can answer
+questions about a document without opening it with PyMuPDF again.
+
+Uploads that MuPDF has to repair, or that are encrypted but open without a
+password, are normalised in the same pass: a clean, unencrypted copy is saved
+next to the upload and used for every later render and export, so the repair
+or decryption cost is paid once.
+
+Sidecars are read on the storage pool. A missing sidecar is rebuilt in the
+sandbox from a thread of its own, like a fresh upload, so storage threads
+never wait on a sandbox job.
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import TypedDict
+
+import reflex as rx
+
+from pdf_signature.utils.sandbox import run_sandboxed
+from pdf_signature.utils.startup import lazy_import
+from pdf_signature.utils.storage import (
+    atomic_path,
+    read_bytes,
+    record_io,
+    run_io,
+    write_atomic,
+)
+
+# Documents are only opened in the sandbox; the web process reads sidecars.
+fitz = lazy_import("fitz")
+
+# Number of document entries kept in memory by this process.
+MAX_CACHED_DOCUMENTS = 256
+
+# Pixmap scale used for page previews; layouts size placeholders with it.
+PREVIEW_SCALE = 2
+
+
+class DocumentInfo(TypedDict):
+    filename: str
+    sha256: str
+    size: int
+    page_count: int
+    # One [width, height, rotation] triple per page, in PDF points.
+    pages: list[list[float]]
+    is_encrypted: bool
+    needs_pass: bool
+    is_repaired: bool
+    # Name of the normalised copy in the upload dir, or "" if not needed.
+    normalized: str
+
+
+_cache: "OrderedDict[str, DocumentInfo]" = OrderedDict()
+# Documents are indexed and looked up from worker threads.
+_cache_lock = threading.Lock()
+
+
+def _index_path(filename: str) -> Path:
+    return rx.get_upload_dir() / "index" / f"{filename}.json"
+
+
+def _remember(info: DocumentInfo):
+    with _cache_lock:
+        _cache[info["filename"]] = info
+        _cache.move_to_end(info["filename"])
+        while len(_cache) > MAX_CACHED_DOCUMENTS:
+            _cache.popitem(last=False)
+
+
+def normalized_filename(filename: str) -> str:
+    return f"{Path(filename).stem}.normalized.pdf"
+
+
+def build_document_info(
+    filename: str, data: bytes, normalized_path: Path | None = None
+) -> DocumentInfo:
+    """Open the document once and collect its metadata.
+
+    With ``normalized_path``, documents needing repair or decryption are also
+    saved there as a clean copy.
+    """
+    doc = fitz.open(stream=data, filetype="pdf")
+    try:
+        pages = []
+        if not doc.needs_pass:
+            for page in doc:
+                rect = page.rect
+                pages.append([round(rect.width, 3), round(rect.height, 3), page.rotation])
+        # Documents opened with an empty user password no longer report
+        # is_encrypted, but still pay for decryption on every open.
+        is_encrypted = bool(doc.is_encrypted or (doc.metadata or {}).get("encryption"))
+        normalized = ""
+        if (
+            normalized_path is not None
+            and not doc.needs_pass
+            and (doc.is_repaired or is_encrypted)
+        ):
+            with atomic_path(normalized_path) as tmp_path:
+                doc.save(tmp_path, garbage=1, encryption=fitz.PDF_ENCRYPT_NONE)
+            normalized = normalized_path.name
+        return {
+            "filename": filename,
+            "sha256": hashlib.sha256(data).hexdigest(),
+            "size": len(data),
+            "page_count": doc.page_count,
+            "pages": pages,
+            "is_encrypted": is_encrypted,
+            "needs_pass": bool(doc.needs_pass),
+            "is_repaired": bool(doc.is_repaired),
+            "normalized": normalized,
+        }
+    finally:
+        doc.close()
+
+
+def index_document(filename: str, data: bytes) -> DocumentInfo:
+    """Build, persist and cache the metadata for a freshly uploaded file.
+
+    The document is opened in the render sandbox, so a hostile file fails
+    with SandboxError instead of hanging or exhausting this process.
+    """
+    upload_dir = rx.get_upload_dir()
+    info = run_sandboxed(
+        build_document_info, filename, data, upload_dir / normalized_filename(filename)
+    )
+    write_atomic(
+        _index_path(filename),
+        json.dumps(info, separators=(",", ":")).encode(),
+        op="index:write",
+    )
+    _remember(info)
+    return info
+
+
+def lookup_document_info(filename: str) -> DocumentInfo | None:
+    """Return the cached or persisted metadata for a file, if it was indexed."""
+    with _cache_lock:
+        info = _cache.get(filename)
+        if info is not None:
+            _cache.move_to_end(filename)
+            return info
+    path = _index_path(filename)
+    try:
+        with record_io("index:read"):
+            info = json.loads(path.read_text())
+    except (OSError, ValueError):
+        return None
+    _remember(info)
+    return info
+
+
+async def get_document_info(filename: str) -> DocumentInfo | None:
+    """Return the metadata for an uploaded file, indexing it if necessary."""
+    info = await run_io("index", lookup_document_info, filename)
+    if info is not None:
+        return info
+    try:
+        data = await read_bytes(rx.get_upload_dir() / filename)
+    except OSError:
+        return None
+    try:
+        return await asyncio.to_thread(index_document, filename, data)
+    except Exception:
+        logging.exception("Error indexing %s", filename)
+        return None
+
+
+def resolve_source(info: DocumentInfo) -> str:
+    """Return the file renders and exports should open for a document."""
+    return info.get("normalized") or info["filename"]
+
+
+def page_size(info: DocumentInfo, page_index: int) -> tuple[float, float]:
+    """Return the (width, height) in points of a zero-based page."""
+    width, height, _ = info["pages"][page_index]
+    return width, height
@@ -0,0 +1,189 @@
+"""In-memory delivery and memoization of signed PDFs.
+
+Exports are kept as bytes in a bounded per-process buffer and served by the
+``/api/signed`` route. Next to the buffer only a small JSON spec (source file,
+boxes and export options) is written to the upload directory, so a worker
+that did not run the export, or whose buffer evicted it, can regenerate the
+document on demand. Exports can also be retained: a copy is then written
+to ``signed/`` in the upload directory and served from there for good, even
+after the buffer, the spec or the source upload are gone.
+
+Export ids are fingerprints of the source document hash and the normalized
+signed boxes and options, so exporting an unchanged document again reuses
+the previous result instead of re-running the pipeline.
+"""
+
+import hashlib
+import json
+import re
+import threading
+from collections import OrderedDict
+from pathlib import Path
+
+import reflex as rx
+
+from pdf_signature.utils.export import render_signed
+from pdf_signature.utils.sandbox import run_sandboxed
+from pdf_signature.utils.storage import record_io, write_atomic
+
+# Upper bound for signed documents held in memory by this process.
+MAX_BUFFER_BYTES = 64 * 1024 * 1024
+# Number of export specs kept on disk; the least recently used are pruned.
+MAX_STORED_EXPORTS = 256
+
+_EXPORT_ID_RE = re.compile(r"[0-9a-f]{32}")
+_buffers: "OrderedDict[str, bytes]" = OrderedDict()
+_buffered_bytes = 0
+# Exports are registered and loaded from worker threads.
+_buffers_lock = threading.Lock()
+
+
+def export_fingerprint(document_hash: str, spec: dict) -> str:
+    """Fingerprint an export from the source hash, signed boxes and options.
+
+    Unsigned boxes do not change the output and are ignored; coordinates are
+    rounded so float noise from the browser does not defeat the cache.
+    """
+    boxes = [
+        {
+            "page": int(box["page"]),
+            "rect": [round(float(box[key]), 3) for key in ("x", "y", "w", "h")],
+            "svg": hashlib.sha256(box["signature_svg"].encode("utf-8")).hexdigest(),
+        }
+        for box in spec["boxes"]
+        if box.get("signature_svg")
+    ]
+    options = {
+        key: spec[key]
+        for key in ("pad_w", "pad_h", "tolerance", "width_step", "profile", "mode")
+    }
+    payload = json.dumps(
+        {"document": document_hash, "boxes": boxes, "options": options},
+        sort_keys=True,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:32]
+
+
+def _spec_path(export_id: str) -> Path:
+    return rx.get_upload_dir() / "exports" / f"{export_id}.json"
+
+
+def _retained_path(export_id: str) -> Path:
+    return rx.get_upload_dir() / "signed" / f"{export_id}.pdf"
+
+
+def _read_spec(path: Path) -> dict:
+    with record_io("export-spec:read"):
+        return json.loads(path.read_text())
+
+
+def _write_spec(path: Path, spec: dict):
+    write_atomic(path, json.dumps(spec).encode(), op="export-spec:write")
+
+
+def _prune_specs(directory: Path):
+    specs = []
+    for path in directory.glob("*.json"):
+        try:
+            specs.append((path.stat().st_mtime, path))
+        except FileNotFoundError:
+            # Pruned by another worker since the listing.
+            continue
+    specs.sort()
+    for _, path in specs[: max(0, len(specs) - MAX_STORED_EXPORTS)]:
+        path.unlink(missing_ok=True)
+        _forget(path.stem)
+
+
+def _forget(export_id: str):
+    global _buffered_bytes
+    with _buffers_lock:
+        if export_id in _buffers:
+            _buffered_bytes -= len(_buffers.pop(export_id))
+
+
+def _remember(export_id: str, data: bytes):
+    global _buffered_bytes
+    with _buffers_lock:
+        if export_id in _buffers:
+            _buffered_bytes -= len(_buffers.pop(export_id))
+        _buffers[export_id] = data
+        _buffered_bytes += len(data)
+        while _buffered_bytes > MAX_BUFFER_BYTES and len(_buffers) > 1:
+            _, evicted = _buffers.popitem(last=False)
+            _buffered_bytes -= len(evicted)
+
+
+def _recall(export_id: str) -> bytes | None:
+    with _buffers_lock:
+        data = _buffers.get(export_id)
+        if data is not None:
+            _buffers.move_to_end(export_id)
+        return data
+
+
+def register_export(export_id: str, spec: dict, data: bytes, stats: dict):
+    """Store a freshly generated export and its spec for later download."""
+    path = _spec_path(export_id)
+    _write_spec(path, {**spec, "stats": stats})
+    _remember(export_id, data)
+    _prune_specs(path.parent)
+
+
+def cached_export_stats(export_id: str, source: str) -> dict | None:
+    """Return the stats of a previous identical export, if still stored.
+
+    The same document may have been uploaded under another name; the spec is
+    pointed at ``source`` when its original file is gone so it can still be
+    regenerated.
+    """
+    path = _spec_path(export_id)
+    try:
+        stored = _read_spec(path)
+    except (OSError, ValueError):
+        return None
+    if not (rx.get_upload_dir() / stored["source"]).exists():
+        stored["source"] = source
+        _write_spec(path, stored)
+    else:
+        path.touch()
+    return stored.get("stats")
+
+
+def retain_export(export_id: str, data: bytes | None = None) -> bool:
+    """Keep a copy of an export on disk; ``data`` defaults to loading it.
+
+    Returns False when the export can no longer be produced.
+    """
+    path = _retained_path(export_id)
+    if path.exists():
+        return True
+    if data is None:
+        data = load_export(export_id)
+        if data is None:
+            return False
+    write_atomic(path, data, op="signed:write")
+    return True
+
+
+def load_export(export_id: str) -> bytes | None:
+    """Return the signed document bytes, regenerating them if needed."""
+    if not _EXPORT_ID_RE.fullmatch(export_id):
+        return None
+    try:
+        with record_io("signed:read"):
+            return _retained_path(export_id).read_bytes()
+    except FileNotFoundError:
+        pass
+    try:
+        spec = _read_spec(_spec_path(export_id))
+    except (OSError, ValueError):
+        return None
+    data = _recall(export_id)
+    if data is None:
+        source = rx.get_upload_dir() / spec["source"]
+        if not source.exists():
+            return None
+        data, _ = run_sandboxed(render_signed, source, spec)
+        _remember(export_id, data)
+    return data
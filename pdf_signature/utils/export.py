@@ -0,0 +1,297 @@
+"""Writing signature boxes into a PDF document for export."""
+
+from __future__ import annotations
+
+import time
+from pathlib import Path
+
+from pdf_signature.utils.startup import lazy_import
+from pdf_signature.utils.strokes import (
+    DEFAULT_STROKE_TOLERANCE_PT,
+    DEFAULT_WIDTH_STEP_PT,
+    build_strokes,
+    group_by_width,
+    parse_signature_svg,
+    quantize_width,
+)
+
+fitz = lazy_import("fitz")
+
+INK_COLOR = (0.067, 0.094, 0.153)  # #111827
+
+# Named PyMuPDF save options for the signed output.
+EXPORT_PROFILES: dict[str, dict] = {
+    # Default save: no object cleanup, quickest to write.
+    "fast": {},
+    # Drop unused objects, compress everything, pack objects into streams.
+    "smallest": {
+        "garbage": 4,
+        "clean": True,
+        "deflate": True,
+        "deflate_images": True,
+        "deflate_fonts": True,
+        "use_objstms": 1,
+        "compression_effort": 100,
+    },
+    # Linearized ("fast web view") so viewers can show page 1 early.
+    "web-optimised": {
+        "garbage": 3,
+        "clean": True,
+        "deflate": True,
+        "linear": True,
+    },
+}
+DEFAULT_EXPORT_PROFILE = "fast"
+
+# How signatures are written: "content" draws them into each page's content
+# stream; "ink" adds them as Ink annotations and leaves page content as is;
+# "ink-flattened" adds Ink annotations and bakes them into the page content.
+EXPORT_MODES = ("content", "ink", "ink-flattened")
+DEFAULT_EXPORT_MODE = "content"
+
+
+def boxes_by_page(boxes: list[dict], page_count: int) -> dict[int, list[dict]]:
+    """Group signed boxes by zero-based page index, in page order.
+
+    Unsigned boxes and boxes pointing outside the document are dropped, so
+    pages without signatures never have to be loaded.
+    """
+    pages: dict[int, list[dict]] = {}
+    for box in boxes:
+        if not box.get("signature_svg", ""):
+            continue
+        page_index = int(box.get("page", 1)) - 1
+        if page_index < 0 or page_index >= page_count:
+            continue
+        pages.setdefault(page_index, []).append(box)
+    return dict(sorted(pages.items()))
+
+
+def box_rect(box: dict, page_rect: fitz.Rect) -> fitz.Rect:
+    """Convert a box's percentage coordinates into a rect on the page."""
+    bx = page_rect.width * (float(box["x"]) / 100.0)
+    by = page_rect.height * (float(box["y"]) / 100.0)
+    bw = page_rect.width * (float(box["w"]) / 100.0)
+    bh = page_rect.height * (float(box["h"]) / 100.0)
+    return fitz.Rect(bx, by, bx + bw, by + bh)
+
+
+def draw_signature(
+    shape: fitz.Shape,
+    rect: fitz.Rect,
+    svg_string: str,
+    pad_w: float,
+    pad_h: float,
+    tolerance: float = DEFAULT_STROKE_TOLERANCE_PT,
+    width_step: float = DEFAULT_WIDTH_STEP_PT,
+):
+    """Draw one signature_pad SVG into ``rect`` on an uncommitted shape."""
+    parsed = parse_signature_svg(svg_string, pad_w, pad_h)
+    svg_w = parsed["viewBox_w"] or pad_w
+    svg_h = parsed["viewBox_h"] or pad_h
+    scale_x = rect.width / svg_w
+    scale_y = rect.height / svg_h
+    scale_w = min(scale_x, scale_y)  # keep stroke width proportional
+
+    if tolerance > 0:
+        strokes = build_strokes(
+            parsed, (rect.x0, rect.y0), scale_x, scale_y, scale_w, tolerance
+        )
+        for width, runs in group_by_width(strokes, width_step).items():
+            for run in runs:
+                shape.draw_polyline([fitz.Point(x, y) for x, y in run])
+            shape.finish(
+                color=INK_COLOR,
+                width=width,
+                closePath=False,
+                lineCap=1,   # round
+                lineJoin=1,  # round
+            )
+    else:
+        curves: dict[float, list[dict]] = {}
+        for pd in parsed["paths"]:
+            width = quantize_width(pd["width"] * scale_w, width_step)
+            curves.setdefault(width, []).append(pd)
+        for width, segments in curves.items():
+            for pd in segments:
+                p1 = fitz.Point(
+                    rect.x0 + pd["start"][0] * scale_x,
+                    rect.y0 + pd["start"][1] * scale_y,
+                )
+                p2 = fitz.Point(
+                    rect.x0 + pd["c1"][0] * scale_x,
+                    rect.y0 + pd["c1"][1] * scale_y,
+                )
+                p3 = fitz.Point(
+                    rect.x0 + pd["c2"][0] * scale_x,
+                    rect.y0 + pd["c2"][1] * scale_y,
+                )
+                p4 = fitz.Point(
+                    rect.x0 + pd["end"][0] * scale_x,
+                    rect.y0 + pd["end"][1] * scale_y,
+                )
+                shape.draw_bezier(p1, p2, p3, p4)
+            shape.finish(
+                color=INK_COLOR,
+                width=width,
+                closePath=False,
+                lineCap=1,   # round
+                lineJoin=1,  # round
+            )
+    for cd in parsed["circles"]:
+        cx = rect.x0 + cd["cx"] * scale_x
+        cy = rect.y0 + cd["cy"] * scale_y
+        r = cd["r"] * scale_w
+        shape.draw_circle(fitz.Point(cx, cy), max(r, 0.5))
+        shape.finish(fill=INK_COLOR, closePath=True)
+
+
+def apply_signatures(
+    doc: fitz.Document,
+    boxes: list[dict],
+    pad_w: float,
+    pad_h: float,
+    tolerance: float = DEFAULT_STROKE_TOLERANCE_PT,
+    width_step: float = DEFAULT_WIDTH_STEP_PT,
+) -> int:
+    """Draw every signed box into ``doc``, one shape and commit per page.
+
+    Returns the number of pages that were modified.
+    """
+    pages = boxes_by_page(boxes, doc.page_count)
+    for page_index, page_boxes in pages.items():
+        page = doc.load_page(page_index)
+        page_rect = page.rect
+        shape = page.new_shape()
+        for box in page_boxes:
+            draw_signature(
+                shape,
+                box_rect(box, page_rect),
+                box["signature_svg"],
+                pad_w,
+                pad_h,
+                tolerance,
+                width_step,
+            )
+        shape.commit()
+    return len(pages)
+
+
+def add_signature_annots(
+    page: fitz.Page,
+    rect: fitz.Rect,
+    svg_string: str,
+    pad_w: float,
+    pad_h: float,
+    tolerance: float = DEFAULT_STROKE_TOLERANCE_PT,
+    width_step: float = DEFAULT_WIDTH_STEP_PT,
+) -> int:
+    """Add one signature_pad SVG in ``rect`` as Ink annotations.
+
+    An Ink annotation has a single border width, so there is one per width
+    bucket; dots join the bucket of their diameter as zero-length strokes
+    with round caps. Ink holds polylines only: curves are always flattened,
+    within the default tolerance when ``tolerance`` is 0. Returns the number
+    of annotations added.
+    """
+    parsed = parse_signature_svg(svg_string, pad_w, pad_h)
+    svg_w = parsed["viewBox_w"] or pad_w
+    svg_h = parsed["viewBox_h"] or pad_h
+    scale_x = rect.width / svg_w
+    scale_y = rect.height / svg_h
+    scale_w = min(scale_x, scale_y)  # keep stroke width proportional
+
+    strokes = build_strokes(
+        parsed,
+        (rect.x0, rect.y0),
+        scale_x,
+        scale_y,
+        scale_w,
+        tolerance if tolerance > 0 else DEFAULT_STROKE_TOLERANCE_PT,
+    )
+    groups = group_by_width(strokes, width_step)
+    for cd in parsed["circles"]:
+        cx = rect.x0 + cd["cx"] * scale_x
+        cy = rect.y0 + cd["cy"] * scale_y
+        diameter = quantize_width(2 * max(cd["r"] * scale_w, 0.5), width_step)
+        groups.setdefault(diameter, []).append([(cx, cy), (cx, cy)])
+    for width, runs in groups.items():
+        # The points are stored twice (InkList and appearance stream); 0.01pt
+        # is far below the stroke tolerance.
+        annot = page.add_ink_annot(
+            [[(round(x, 2), round(y, 2)) for x, y in run] for run in runs]
+        )
+        annot.set_border(width=width)
+        annot.set_colors(stroke=INK_COLOR)
+        annot.update()
+    return len(groups)
+
+
+def annotate_signatures(
+    doc: fitz.Document,
+    boxes: list[dict],
+    pad_w: float,
+    pad_h: float,
+    tolerance: float = DEFAULT_STROKE_TOLERANCE_PT,
+    width_step: float = DEFAULT_WIDTH_STEP_PT,
+) -> int:
+    """Add every signed box to ``doc`` as Ink annotations.
+
+    Page content streams are left untouched. Returns the number of pages
+    that were modified.
+    """
+    pages = boxes_by_page(boxes, doc.page_count)
+    for page_index, page_boxes in pages.items():
+        page = doc.load_page(page_index)
+        page_rect = page.rect
+        for box in page_boxes:
+            add_signature_annots(
+                page,
+                box_rect(box, page_rect),
+                box["signature_svg"],
+                pad_w,
+                pad_h,
+                tolerance,
+                width_step,
+            )
+    return len(pages)
+
+
+def sign_document(doc: fitz.Document, spec: dict, mode: str = DEFAULT_EXPORT_MODE):
+    """Write the signed boxes of an export spec into ``doc`` in ``mode``."""
+    options = (
+        spec["boxes"],
+        spec["pad_w"],
+        spec["pad_h"],
+        spec.get("tolerance", DEFAULT_STROKE_TOLERANCE_PT),
+        spec.get("width_step", DEFAULT_WIDTH_STEP_PT),
+    )
+    if mode == "content":
+        apply_signatures(doc, *options)
+    else:
+        annotate_signatures(doc, *options)
+        if mode == "ink-flattened":
+            doc.bake(annots=True, widgets=False)
+
+
+def render_signed(pdf_path: Path, spec: dict) -> tuple[bytes, dict]:
+    """Generate the signed PDF described by an export spec in memory.
+
+    Returns the document bytes and size/timing stats for the save step.
+    """
+    profile = spec.get("profile", DEFAULT_EXPORT_PROFILE)
+    if profile not in EXPORT_PROFILES:
+        profile = DEFAULT_EXPORT_PROFILE
+    mode = spec.get("mode", DEFAULT_EXPORT_MODE)
+    if mode not in EXPORT_MODES:
+        mode = DEFAULT_EXPORT_MODE
+    doc = fitz.open(pdf_path)
+    try:
+        sign_document(doc, spec, mode)
+        start = time.perf_counter()
+        data = doc.tobytes(**EXPORT_PROFILES[profile])
+        save_ms = (time.perf_counter() - start) * 1000
+    finally:
+        doc.close()
+    stats = {"profile": profile, "mode": mode, "bytes": len(data), "save_ms": save_ms}
+    return data, stats
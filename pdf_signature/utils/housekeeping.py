@@ -0,0 +1,50 @@
+"""Periodic clean-up of the caches in the upload directory.
+
+Signature blobs and page renders are content-addressed and shared by every
+worker, so no session owns them and nothing deletes them when a session
+ends. While the app runs, each process sweeps them every
+``SWEEP_INTERVAL_SECONDS`` with ``prune_blobs`` and ``prune_renders``. Sweeps
+by several workers at once only race to delete the same files.
+"""
+
+import asyncio
+import contextlib
+import logging
+
+from pdf_signature.utils.blobs import prune_blobs
+from pdf_signature.utils.render_cache import prune_renders
+
+SWEEP_INTERVAL_SECONDS = 3600
+
+
+def sweep() -> tuple[int, int]:
+    """Prune the blob store and the render cache once.
+
+    Returns how many blobs and renders were deleted.
+    """
+    return prune_blobs(), prune_renders()
+
+
+async def _sweep_periodically():
+    while True:
+        try:
+            # Off the storage pool: a sweep lists whole directories.
+            blobs, renders = await asyncio.to_thread(sweep)
+        except Exception:
+            logging.exception("Cache sweep failed")
+        else:
+            if blobs or renders:
+                logging.info(
+                    "Cache sweep: deleted %d blobs, %d renders", blobs, renders
+                )
+        await asyncio.sleep(SWEEP_INTERVAL_SECONDS)
+
+
+@contextlib.asynccontextmanager
+async def sweep_caches():
+    """Lifespan task: sweep the caches periodically while the app runs."""
+    task = asyncio.create_task(_sweep_periodically())
+    try:
+        yield
+    finally:
+        task.cancel()
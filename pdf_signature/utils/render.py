@@ -0,0 +1,169 @@
+"""Rasterising PDF pages into preview images in the upload directory."""
+
+from __future__ import annotations
+
+import hashlib
+import logging
+import math
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+
+from pdf_signature.utils.doc_index import PREVIEW_SCALE
+from pdf_signature.utils.startup import lazy_import
+from pdf_signature.utils.storage import atomic_path
+
+fitz = lazy_import("fitz")
+
+# PDF.js build the "client" render mode loads (copied by vendor_pdfjs.sh).
+PDFJS_DIR = Path(__file__).resolve().parents[2] / "assets" / "pdfjs"
+
+# Where pages are rasterised: "server" renders PNGs with PyMuPDF, "client"
+# has the browser fetch the PDF and render it with PDF.js. "client" is only
+# offered when PDF.js has been vendored into assets/pdfjs/.
+RENDER_MODES = (
+    ("server", "client") if (PDFJS_DIR / "pdf.min.mjs").is_file() else ("server",)
+)
+DEFAULT_RENDER_MODE = "server"
+
+# Pixmap scale of the quick first pass (36 dpi), shown stretched to the
+# page's layout size until the full-quality image replaces it.
+DRAFT_SCALE = 0.5
+
+# Time a navigation waits before rendering when the previous page's render is
+# still pending, so that clicks through several pages only rasterise the page
+# the user settles on. A page turn with no render pending starts at once.
+RENDER_SETTLE_SECONDS = 0.25
+
+# Largest pixmap one render may allocate. Pages that would exceed it at the
+# requested scale are rendered at a lower effective DPI instead. Renders run
+# one per sandbox worker, so pixmaps never hold more than SANDBOX_WORKERS
+# times this at once; each worker's RLIMIT_AS caps the rest of its memory.
+MAX_RENDER_PIXELS = 16_000_000  # ~46 MB as RGB
+
+# Memory budget for interpreted pages kept for re-rendering (draft and full
+# passes, revisits). Display lists hold no reference to their document.
+MAX_DISPLAY_LIST_BYTES = 64 * 1024 * 1024
+
+_DISPLAY_LIST_OVERHEAD = 16 * 1024
+
+# File contents identified per worker, e.g. copies of the same template.
+MAX_CONTENT_KEYS = 1024
+
+_display_lists: "OrderedDict[tuple[str, int], tuple[fitz.DisplayList, int]]" = (
+    OrderedDict()
+)
+_display_list_bytes = 0
+_display_list_lock = threading.Lock()
+_content_keys: "OrderedDict[tuple[str, int, int], str]" = OrderedDict()
+
+
+def budget_scale(
+    width_pt: float, height_pt: float, scale: float, max_pixels: int = MAX_RENDER_PIXELS
+) -> float:
+    """Return the largest scale <= ``scale`` whose pixmap fits ``max_pixels``."""
+    area = width_pt * height_pt
+    if area <= 0 or area * scale * scale <= max_pixels:
+        return scale
+    return math.sqrt(max_pixels / area)
+
+
+def _estimate_display_list_bytes(doc: fitz.Document, page: fitz.Page) -> int:
+    """Approximate a display list's size from its content and image streams."""
+    images = 0
+    for image in page.get_images(full=True):
+        kind, length = doc.xref_get_key(image[0], "Length")
+        if kind == "int":
+            images += int(length)
+    return len(page.read_contents()) + images + _DISPLAY_LIST_OVERHEAD
+
+
+def _content_key(pdf_path: Path) -> str:
+    """Return the SHA-256 of a file, hashing it once per path and version.
+
+    Uploads of the same document get distinct names; keying cached pages by
+    content lets them, and preloaded templates, share interpreted pages.
+    """
+    stat = os.stat(pdf_path)
+    version = (str(pdf_path), stat.st_size, stat.st_mtime_ns)
+    with _display_list_lock:
+        key = _content_keys.get(version)
+    if key is None:
+        with open(pdf_path, "rb") as f:
+            key = hashlib.file_digest(f, "sha256").hexdigest()
+        with _display_list_lock:
+            _content_keys[version] = key
+            while len(_content_keys) > MAX_CONTENT_KEYS:
+                _content_keys.popitem(last=False)
+    return key
+
+
+def get_display_list(pdf_path: Path, page_number: int) -> fitz.DisplayList:
+    """Return a one-based page's display list, interpreting it on a miss.
+
+    Pages are cached by file content. Entries are evicted least recently
+    used first once their estimated size exceeds ``MAX_DISPLAY_LIST_BYTES``.
+    """
+    global _display_list_bytes
+    key = (_content_key(pdf_path), page_number)
+    with _display_list_lock:
+        entry = _display_lists.get(key)
+        if entry is not None:
+            _display_lists.move_to_end(key)
+            return entry[0]
+    doc = fitz.open(pdf_path)
+    try:
+        page = doc.load_page(page_number - 1)
+        display_list = page.get_displaylist()
+        nbytes = _estimate_display_list_bytes(doc, page)
+    finally:
+        doc.close()
+    if nbytes > MAX_DISPLAY_LIST_BYTES:
+        return display_list
+    with _display_list_lock:
+        if key not in _display_lists:
+            _display_lists[key] = (display_list, nbytes)
+            _display_list_bytes += nbytes
+        while _display_list_bytes > MAX_DISPLAY_LIST_BYTES:
+            _, (_, evicted) = _display_lists.popitem(last=False)
+            _display_list_bytes -= evicted
+    return display_list
+
+
+def render_page_png(
+    pdf_path: Path, page_number: int, image_path: Path, scale: float = PREVIEW_SCALE
+) -> tuple[int, int, float]:
+    """Render a one-based page to a PNG within the pixel budget.
+
+    Returns the pixel size and the scale actually used, which is lower than
+    ``scale`` for pages too large to fit ``MAX_RENDER_PIXELS``. The page is
+    interpreted once and its cached display list reused by later passes. The
+    image is written to a temporary name and moved into place, so a concurrent
+    render of the same page never exposes a half-written file.
+    """
+    display_list = get_display_list(pdf_path, page_number)
+    rect = display_list.rect
+    scale = budget_scale(rect.width, rect.height, scale)
+    pix = display_list.get_pixmap(matrix=fitz.Matrix(scale, scale))
+    # Renders can be regenerated at any time, so they skip fsync.
+    with atomic_path(image_path, fsync="none") as tmp_path:
+        pix.save(tmp_path, output="png")
+    return int(pix.width), int(pix.height), scale
+
+
+def preload_templates(paths: tuple[str, ...], pages: int):
+    """Interpret the first ``pages`` pages of each PDF into the page cache.
+
+    Each page is also drawn once at draft scale, which loads its fonts and
+    fills MuPDF's glyph cache. Files that cannot be opened are skipped.
+    """
+    for path in paths:
+        try:
+            with fitz.open(path) as doc:
+                page_count = doc.page_count
+            for page_number in range(1, min(pages, page_count) + 1):
+                display_list = get_display_list(Path(path), page_number)
+                display_list.get_pixmap(matrix=fitz.Matrix(DRAFT_SCALE, DRAFT_SCALE))
+        except Exception:
+            logging.warning("Could not preload template %s", path, exc_info=True)
@@ -0,0 +1,155 @@
+"""Single-flight page renders shared by every worker process.
+
+Page images are content-addressed (see ``render_image_name``), so an image
+rendered by one process can be served for every later request. Within a
+process, concurrent requests for the same image await one render. Across
+processes, an exclusive lock file serialises them, and a process that waited
+on the lock finds the image already rendered. A small JSON record next to
+the lock keeps the image's pixel size and the scale it was rendered at.
+
+A cache hit refreshes the record's mtime, and ``prune_renders`` deletes the
+least recently used renders beyond ``MAX_CACHED_RENDERS``, with their lock
+files, as well as lock files left by renders that never finished.
+"""
+
+import asyncio
+import json
+import os
+import time
+from pathlib import Path
+
+try:
+    import fcntl
+except ImportError:  # not available on Windows
+    fcntl = None
+
+import reflex as rx
+
+from pdf_signature.utils.render import render_page_png
+from pdf_signature.utils.sandbox import run_sandboxed
+from pdf_signature.utils.storage import record_io, write_atomic
+
+# Renders (drafts and full-quality pages) kept by prune_renders.
+MAX_CACHED_RENDERS = 2048
+# A lock file without a record this old belongs to no render in flight.
+_STALE_LOCK_SECONDS = 3600
+
+_inflight: "dict[tuple[str, float], asyncio.Future]" = {}
+
+
+def _cache_dir() -> Path:
+    return rx.get_upload_dir() / "render-cache"
+
+
+def lookup_render(image_path: Path, scale: float) -> tuple[int, int, float] | None:
+    """Return (width, height, scale used) of an existing render, if any."""
+    record = _cache_dir() / f"{image_path.name}.json"
+    try:
+        with record_io("render-cache:read"):
+            meta = json.loads(record.read_text())
+            if meta.get("requested") != scale or not image_path.is_file():
+                return None
+            # Mark the render as recently used for prune_renders.
+            os.utime(record)
+    except (OSError, ValueError):
+        return None
+    return meta["width"], meta["height"], meta["scale"]
+
+
+def render_shared(
+    pdf_path: Path, page_number: int, image_path: Path, scale: float
+) -> tuple[int, int, float]:
+    """Render a page in the sandbox unless any process already has.
+
+    Blocks while another process holds the page's lock file.
+    """
+    result = lookup_render(image_path, scale)
+    if result is not None:
+        return result
+    directory = _cache_dir()
+    directory.mkdir(parents=True, exist_ok=True)
+    with open(directory / f"{image_path.name}.lock", "a+b") as lock:
+        if fcntl is not None:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+        try:
+            result = lookup_render(image_path, scale)
+            if result is not None:
+                return result
+            width, height, used = run_sandboxed(
+                render_page_png, pdf_path, page_number, image_path, scale
+            )
+            record = {
+                "requested": scale,
+                "width": width,
+                "height": height,
+                "scale": used,
+            }
+            # Like the image itself, the record can always be regenerated.
+            write_atomic(
+                directory / f"{image_path.name}.json",
+                json.dumps(record).encode(),
+                fsync="none",
+                op="render-cache:write",
+            )
+            return width, height, used
+        finally:
+            if fcntl is not None:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+
+def prune_renders(max_entries: int = MAX_CACHED_RENDERS) -> int:
+    """Delete the least recently used renders beyond ``max_entries``.
+
+    Returns how many renders were deleted.
+    """
+    directory = _cache_dir()
+    records = []
+    for path in directory.glob("*.json"):
+        try:
+            records.append((path.stat().st_mtime, path))
+        except FileNotFoundError:
+            # Pruned by another worker since the listing.
+            continue
+    records.sort()
+    upload_dir = rx.get_upload_dir()
+    pruned = records[: max(0, len(records) - max_entries)]
+    for _, record in pruned:
+        name = record.name.removesuffix(".json")
+        record.unlink(missing_ok=True)
+        (upload_dir / name).unlink(missing_ok=True)
+        (directory / f"{name}.lock").unlink(missing_ok=True)
+    cutoff = time.time() - _STALE_LOCK_SECONDS
+    for lock in directory.glob("*.lock"):
+        record = directory / f"{lock.name.removesuffix('.lock')}.json"
+        try:
+            if record.exists() or lock.stat().st_mtime >= cutoff:
+                continue
+        except FileNotFoundError:
+            continue
+        lock.unlink(missing_ok=True)
+    return len(pruned)
+
+
+def _settle(key: tuple[str, float], future: asyncio.Future):
+    _inflight.pop(key, None)
+    # Mark the outcome as retrieved in case every waiter was cancelled.
+    if not future.cancelled():
+        future.exception()
+
+
+async def render_once(
+    pdf_path: Path, page_number: int, image_path: Path, scale: float
+) -> tuple[int, int, float]:
+    """Await the shared render of a page, joining one already in flight.
+
+    Cancelling a waiter does not cancel the render other waiters share.
+    """
+    key = (str(image_path), scale)
+    future = _inflight.get(key)
+    if future is None:
+        future = asyncio.ensure_future(
+            asyncio.to_thread(render_shared, pdf_path, page_number, image_path, scale)
+        )
+        _inflight[key] = future
+        future.add_done_callback(lambda f: _settle(key, f))
+    return await asyncio.shield(future)
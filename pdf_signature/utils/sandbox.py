@@ -0,0 +1,264 @@
+"""Supervised worker processes for parsing and rendering untrusted PDFs.
+
+PyMuPDF runs in a small pool of subprocesses so that a malformed or hostile
+document can only hang or exhaust its own worker: every job has a wall-clock
+timeout, workers run under an address-space limit, and a worker that times
+out or dies is killed and replaced on the next job. Jobs are module-level
+functions, pickled by reference together with their arguments.
+
+Where the platform supports it, workers are forked from a fork server that
+has imported the preload modules once, so starting or replacing a worker
+costs a fork rather than a fresh interpreter loading PyMuPDF.
+"""
+
+import logging
+import multiprocessing
+import os
+import threading
+import time
+
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None
+
+# Number of worker processes, i.e. PyMuPDF jobs that can run at once.
+SANDBOX_WORKERS = min(4, os.cpu_count() or 1)
+
+# Wall-clock limit for a single job, including the wait for a free worker and
+# a fresh worker's start-up.
+JOB_TIMEOUT_SECONDS = 30.0
+
+# Address-space limit (RLIMIT_AS) applied inside each worker.
+WORKER_MEMORY_LIMIT_BYTES = 2 * 1024 * 1024 * 1024
+
+# Workers are replaced after this many jobs to bound slow leaks.
+MAX_JOBS_PER_WORKER = 500
+
+# "forkserver" forks workers from a preloaded server; "spawn" starts each
+# worker as a fresh interpreter (the only choice on Windows).
+DEFAULT_START_METHOD = (
+    "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+)
+
+# Modules the fork server imports before forking workers, resolved from the
+# backend's working directory.
+WORKER_PRELOAD_MODULES = ("pdf_signature.utils.worker_preload",)
+
+
+class SandboxError(RuntimeError):
+    """A sandboxed job failed; the message is safe to show to users."""
+
+
+class SandboxTimeout(SandboxError):
+    """A sandboxed job exceeded its wall-clock limit and was killed."""
+
+
+class SandboxCrashed(SandboxError):
+    """A worker died while running a job (e.g. killed for memory)."""
+
+
+def _worker_main(conn, memory_limit: int):
+    if resource is not None and memory_limit:
+        try:
+            resource.setrlimit(resource.RLIMIT_AS, (memory_limit, memory_limit))
+        except (ValueError, OSError) as e:
+            # E.g. a container whose hard limit is lower; run without the cap.
+            logging.warning("Could not limit sandbox worker memory: %s", e)
+    while True:
+        try:
+            fn, args, kwargs = conn.recv()
+        except (EOFError, OSError):
+            return
+        try:
+            reply = ("ok", fn(*args, **kwargs))
+        except BaseException as e:
+            reply = ("error", type(e).__name__, str(e))
+        conn.send(reply)
+
+
+class _Worker:
+    def __init__(self, ctx, memory_limit: int):
+        self.conn, child_conn = ctx.Pipe()
+        self.process = ctx.Process(
+            target=_worker_main,
+            args=(child_conn, memory_limit),
+            name="pdf-sandbox",
+            daemon=True,
+        )
+        self.process.start()
+        child_conn.close()
+        self.jobs = 0
+
+    def kill(self):
+        if self.process.is_alive():
+            self.process.kill()
+        self.process.join(timeout=1)
+        self.conn.close()
+
+
+def _job_name(fn) -> str:
+    return getattr(fn, "__name__", "job")
+
+
+class RenderSandbox:
+    """A pool of supervised PyMuPDF workers."""
+
+    def __init__(
+        self,
+        workers: int = SANDBOX_WORKERS,
+        timeout: float = JOB_TIMEOUT_SECONDS,
+        memory_limit: int = WORKER_MEMORY_LIMIT_BYTES,
+        start_method: str = DEFAULT_START_METHOD,
+        preload: tuple[str, ...] = (),
+    ):
+        self.timeout = timeout
+        self.memory_limit = memory_limit
+        self._size = workers
+        self._ctx = multiprocessing.get_context(start_method)
+        if start_method == "forkserver" and preload:
+            # Takes effect when the fork server starts, i.e. with the first worker.
+            self._ctx.set_forkserver_preload(list(preload))
+        self._slots = threading.BoundedSemaphore(workers)
+        self._idle: list[_Worker] = []
+        self._lock = threading.Lock()
+
+    def _checkout(self, timeout: float) -> _Worker:
+        if not self._slots.acquire(timeout=timeout):
+            logging.warning("No sandbox worker became free within %gs", timeout)
+            raise SandboxTimeout("The server is busy. Please try again.")
+        with self._lock:
+            while self._idle:
+                worker = self._idle.pop()
+                if worker.process.is_alive():
+                    return worker
+                worker.kill()
+        try:
+            return _Worker(self._ctx, self.memory_limit)
+        except BaseException:
+            self._slots.release()
+            raise
+
+    def _checkin(self, worker: _Worker, healthy: bool):
+        if healthy and worker.jobs < MAX_JOBS_PER_WORKER:
+            with self._lock:
+                self._idle.append(worker)
+        else:
+            worker.kill()
+        self._slots.release()
+
+    def _send(self, worker: _Worker, fn, args: tuple, kwargs: dict):
+        try:
+            worker.conn.send((fn, args, kwargs))
+        except (EOFError, OSError):
+            self._crashed(worker, fn)
+        worker.jobs += 1
+
+    def _receive(self, worker: _Worker, fn, timeout: float, deadline: float):
+        """Wait until ``deadline`` (monotonic) for the reply to a job."""
+        try:
+            if not worker.conn.poll(max(deadline - time.monotonic(), 0)):
+                logging.warning(
+                    "Sandboxed %s timed out after %gs", _job_name(fn), timeout
+                )
+                raise SandboxTimeout(f"Processing timed out after {timeout:g}s.")
+            return worker.conn.recv()
+        except (EOFError, OSError):
+            self._crashed(worker, fn)
+
+    def _crashed(self, worker: _Worker, fn):
+        worker.process.join(timeout=1)
+        logging.warning(
+            "Sandbox worker died during %s (exit code %s)",
+            _job_name(fn),
+            worker.process.exitcode,
+        )
+        raise SandboxCrashed(
+            "Processing failed: the document exhausted its resources."
+        ) from None
+
+    def call(self, fn, *args, timeout: float | None = None, **kwargs):
+        """Run ``fn(*args, **kwargs)`` in a worker and return its result.
+
+        Blocks the calling thread for at most ``timeout`` seconds, queueing
+        for a free worker included; raises SandboxError when the job fails,
+        times out or takes its worker down.
+        """
+        timeout = self.timeout if timeout is None else timeout
+        deadline = time.monotonic() + timeout
+        worker = self._checkout(timeout)
+        healthy = False
+        try:
+            self._send(worker, fn, args, kwargs)
+            reply = self._receive(worker, fn, timeout, deadline)
+            healthy = reply[0] == "ok" or reply[1] != "MemoryError"
+        finally:
+            self._checkin(worker, healthy)
+        if reply[0] == "ok":
+            return reply[1]
+        _, kind, message = reply
+        if kind == "MemoryError":
+            raise SandboxError("Processing failed: the document needs too much memory.")
+        raise SandboxError(message or kind)
+
+    def warm(self, fn, *args, **kwargs):
+        """Start every worker and run ``fn(*args, **kwargs)`` in each.
+
+        Used to preload modules, so the first jobs do not pay for it. Waits
+        for busy workers to finish their job; workers whose warm-up job fails
+        are replaced on their next job.
+        """
+        workers: list[_Worker] = []
+        healthy: set[_Worker] = set()
+        try:
+            for _ in range(self._size):
+                workers.append(self._checkout(self.timeout))
+            sent = []
+            deadline = time.monotonic() + self.timeout
+            for worker in workers:
+                try:
+                    self._send(worker, fn, args, kwargs)
+                    sent.append(worker)
+                except SandboxError:
+                    pass
+            for worker in sent:
+                try:
+                    if self._receive(worker, fn, self.timeout, deadline)[0] == "ok":
+                        healthy.add(worker)
+                except SandboxError:
+                    pass
+        finally:
+            for worker in workers:
+                self._checkin(worker, worker in healthy)
+
+    def shutdown(self):
+        """Stop the idle workers; busy ones are daemons and die with the app."""
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for worker in idle:
+            worker.kill()
+
+
+_sandbox: RenderSandbox | None = None
+_sandbox_lock = threading.Lock()
+
+
+def get_sandbox() -> RenderSandbox:
+    global _sandbox
+    with _sandbox_lock:
+        if _sandbox is None:
+            _sandbox = RenderSandbox(preload=WORKER_PRELOAD_MODULES)
+        return _sandbox
+
+
+def shutdown_sandbox():
+    """Stop the shared sandbox's idle workers, if it was ever started."""
+    with _sandbox_lock:
+        sandbox = _sandbox
+    if sandbox is not None:
+        sandbox.shutdown()
+
+
+def run_sandboxed(fn, *args, **kwargs):
+    """Run a module-level function in the shared sandbox (blocking)."""
+    return get_sandbox().call(fn, *args, **kwargs)
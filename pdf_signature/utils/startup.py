@@ -0,0 +1,135 @@
+"""Cold start: lazy heavy imports, sandbox warm-up and a startup report.
+
+A new replica serves nothing until Reflex is imported and the app compiled,
+so the app module keeps everything else off that path. PyMuPDF in particular
+only runs inside the render sandbox; the web process imports it lazily and
+in practice never loads it. Sandbox workers do need it, so once the app is
+serving they are started and preloaded in the background (``warm_up``), and
+the first upload does not pay for it.
+
+Startup phases are timed per process and reported by ``startup_report``:
+
+- ``boot``: process start until the app module starts importing (the
+  interpreter, Reflex and the server starting up; Linux only)
+- ``import``: importing the app module
+- ``compile``: from then until the app serves, i.e. Reflex compiling or
+  evaluating the pages
+- ``warm_up``: starting and preloading the sandbox workers, in the background
+
+When the app shuts down, ``stop_sandbox`` stops the idle sandbox workers.
+"""
+
+import asyncio
+import contextlib
+import importlib
+import importlib.util
+import logging
+import os
+import sys
+import time
+
+from pdf_signature.utils.sandbox import (
+    WORKER_PRELOAD_MODULES,
+    get_sandbox,
+    shutdown_sandbox,
+)
+
+# Start and preload every sandbox worker once the app is serving.
+WARM_UP_ON_START = True
+
+_marks: dict[str, float] = {"import": time.perf_counter()}
+
+
+def _process_age_ms() -> float | None:
+    """Milliseconds since this process started, where the OS tells (Linux)."""
+    try:
+        with open("/proc/self/stat") as f:
+            # Fields after the command name, which may contain spaces.
+            fields = f.read().rpartition(")")[2].split()
+        with open("/proc/uptime") as f:
+            uptime = float(f.read().split()[0])
+        started = int(fields[19]) / os.sysconf("SC_CLK_TCK")
+    except (OSError, ValueError, IndexError, AttributeError):
+        return None
+    return round((uptime - started) * 1000, 1)
+
+
+_boot_ms = _process_age_ms()
+
+
+def lazy_import(name: str):
+    """Return module ``name``, executed on first attribute access."""
+    if name in sys.modules:
+        return sys.modules[name]
+    spec = importlib.util.find_spec(name)
+    if spec is None:
+        raise ModuleNotFoundError(f"No module named {name!r}", name=name)
+    loader = importlib.util.LazyLoader(spec.loader)
+    spec.loader = loader
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    loader.exec_module(module)
+    return module
+
+
+def mark(phase: str):
+    """Record that startup reached ``phase`` ("imported", "serving", "warm")."""
+    _marks.setdefault(phase, time.perf_counter())
+
+
+def _span_ms(start: str, end: str) -> float | None:
+    if start not in _marks or end not in _marks:
+        return None
+    return round((_marks[end] - _marks[start]) * 1000, 1)
+
+
+def startup_report() -> dict[str, float | None]:
+    """Milliseconds spent in each startup phase (None: not reached yet)."""
+    return {
+        "boot_ms": _boot_ms,
+        "import_ms": _span_ms("import", "imported"),
+        "compile_ms": _span_ms("imported", "serving"),
+        "warm_up_ms": _span_ms("serving", "warm"),
+    }
+
+
+def _preload(modules: tuple[str, ...]):
+    for name in modules:
+        importlib.import_module(name)
+
+
+async def warm_up():
+    """Start every sandbox worker with PyMuPDF and the job modules loaded.
+
+    Forked workers inherit them from the fork server; spawned ones import
+    them in this job.
+    """
+    try:
+        await asyncio.to_thread(get_sandbox().warm, _preload, WORKER_PRELOAD_MODULES)
+    except Exception:
+        logging.exception("Sandbox warm-up failed")
+    mark("warm")
+
+
+async def on_startup():
+    """Lifespan task: report the startup phases, then warm the sandbox up."""
+    mark("serving")
+    report = startup_report()
+    logging.info(
+        "Startup: boot %s ms, import %s ms, compile %s ms",
+        report["boot_ms"],
+        report["import_ms"],
+        report["compile_ms"],
+    )
+    if WARM_UP_ON_START:
+        await warm_up()
+        logging.info("Startup: sandbox warm-up %s ms", startup_report()["warm_up_ms"])
+
+
+@contextlib.asynccontextmanager
+async def stop_sandbox():
+    """Lifespan task: stop the sandbox workers when the app shuts down."""
+    try:
+        yield
+    finally:
+        await asyncio.to_thread(shutdown_sandbox)
@@ -0,0 +1,228 @@
+"""Off-loop reads and writes for files in the upload directory.
+
+Event handlers and API routes await these helpers instead of touching the
+disk themselves. The work runs on a small thread pool reserved for storage,
+so a slow or network-backed upload volume stalls that pool rather than the
+event loop or the threads waiting on the render sandbox.
+
+Writes go to a temporary name in the target directory and are renamed into
+place, so readers never see a partial file. The fsync policy decides how
+much durability a write pays for. Time spent on storage is accumulated per
+operation (see ``io_stats``) and can be attributed to a single event with
+``track_io_wait``.
+"""
+
+import asyncio
+import contextvars
+import logging
+import os
+import stat
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from pathlib import Path
+from typing import TypedDict
+
+# "none" leaves flushing to the OS, "data" fsyncs a file before renaming it
+# into place, "full" also fsyncs the directory so the rename survives a crash.
+FSYNC_POLICIES = ("none", "data", "full")
+DEFAULT_FSYNC_POLICY = "data"
+
+# Threads serving storage calls, i.e. file operations that can run at once.
+STORAGE_THREADS = 4
+
+# Operations slower than this are logged as warnings.
+SLOW_IO_SECONDS = 0.5
+
+
+class IOStats(TypedDict):
+    calls: int
+    bytes: int
+    # Time spent performing the operation, on whichever thread ran it.
+    busy_ms: float
+    # Time callers were kept waiting, including queueing for a storage thread.
+    wait_ms: float
+
+
+class IOWait:
+    """Milliseconds of storage wait accumulated by one event or request."""
+
+    def __init__(self):
+        self.ms = 0.0
+        self._lock = threading.Lock()
+
+    def add(self, ms: float):
+        with self._lock:
+            self.ms += ms
+
+
+_stats: dict[str, IOStats] = {}
+_stats_lock = threading.Lock()
+_current_wait: contextvars.ContextVar[IOWait | None] = contextvars.ContextVar(
+    "storage_io_wait", default=None
+)
+_executor: ThreadPoolExecutor | None = None
+_executor_lock = threading.Lock()
+
+
+def _record(op: str, nbytes: int, busy: float, wait: float):
+    with _stats_lock:
+        entry = _stats.setdefault(
+            op, {"calls": 0, "bytes": 0, "busy_ms": 0.0, "wait_ms": 0.0}
+        )
+        entry["calls"] += 1
+        entry["bytes"] += nbytes
+        entry["busy_ms"] += busy * 1000
+        entry["wait_ms"] += wait * 1000
+    tracker = _current_wait.get()
+    if tracker is not None:
+        tracker.add(wait * 1000)
+    if wait >= SLOW_IO_SECONDS:
+        logging.warning("Slow storage %s: %.0f ms (%d bytes)", op, wait * 1000, nbytes)
+
+
+def io_stats() -> dict[str, IOStats]:
+    """Return a snapshot of this process's storage counters, per operation."""
+    with _stats_lock:
+        return {op: dict(entry) for op, entry in _stats.items()}
+
+
+@contextmanager
+def track_io_wait():
+    """Attribute the storage wait of the enclosed calls to one ``IOWait``.
+
+    Calls made from threads started with ``asyncio.to_thread`` inside the
+    block are included, since they run in a copy of the caller's context.
+    """
+    tracker = IOWait()
+    token = _current_wait.set(tracker)
+    try:
+        yield tracker
+    finally:
+        _current_wait.reset(token)
+
+
+@contextmanager
+def record_io(op: str, nbytes: int = 0):
+    """Count a blocking storage operation performed on the current thread."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        _record(op, nbytes, elapsed, elapsed)
+
+
+def _fsync_path(path: Path):
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+@contextmanager
+def atomic_path(path: Path, fsync: str | None = None):
+    """Yield a temporary path and move it onto ``path`` once it is written.
+
+    The temporary file lives in the same directory, so the final rename is
+    atomic; it is removed if the block fails.
+    """
+    policy = DEFAULT_FSYNC_POLICY if fsync is None else fsync
+    if policy not in FSYNC_POLICIES:
+        raise ValueError(f"Unknown fsync policy {policy!r}")
+    tmp_path = path.with_name(f".{uuid.uuid4().hex}.tmp")
+    try:
+        yield tmp_path
+        if policy != "none":
+            _fsync_path(tmp_path)
+        os.replace(tmp_path, path)
+        if policy == "full" and os.name == "posix":
+            _fsync_path(path.parent)
+    finally:
+        tmp_path.unlink(missing_ok=True)
+
+
+def _write(path: Path, data: bytes, fsync: str | None):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with atomic_path(path, fsync) as tmp_path:
+        tmp_path.write_bytes(data)
+
+
+def write_atomic(
+    path: Path, data: bytes, fsync: str | None = None, op: str = "write"
+):
+    """Atomically replace ``path`` with ``data``, creating its directory."""
+    with record_io(op, len(data)):
+        _write(path, data, fsync)
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=STORAGE_THREADS, thread_name_prefix="storage"
+            )
+        return _executor
+
+
+def _run_untracked(fn, args):
+    # The awaiting caller is charged for the whole call; nested record_io
+    # calls still update the per-operation counters.
+    _current_wait.set(None)
+    return fn(*args)
+
+
+async def run_io(op: str, fn, *args, nbytes: int = 0):
+    """Run a blocking file function on the storage pool and record its wait.
+
+    ``nbytes`` is the size written; for functions returning bytes it
+    defaults to the size read.
+    """
+    ctx = contextvars.copy_context()
+    queued = time.perf_counter()
+    busy = 0.0
+
+    def call():
+        nonlocal busy
+        start = time.perf_counter()
+        try:
+            return ctx.run(_run_untracked, fn, args)
+        finally:
+            busy = time.perf_counter() - start
+
+    try:
+        result = await asyncio.get_running_loop().run_in_executor(
+            _get_executor(), call
+        )
+        if isinstance(result, bytes):
+            nbytes = nbytes or len(result)
+        return result
+    finally:
+        _record(op, nbytes, busy, time.perf_counter() - queued)
+
+
+async def write_bytes(path: Path, data: bytes, fsync: str | None = None):
+    """Atomically write ``data`` to ``path`` without blocking the loop."""
+    await run_io("write", _write, path, data, fsync, nbytes=len(data))
+
+
+async def read_bytes(path: Path) -> bytes:
+    """Read a whole file without blocking the loop."""
+    return await run_io("read", Path.read_bytes, path)
+
+
+async def stat_file(path: Path) -> os.stat_result | None:
+    """Return the stat of a regular file, or None if there is none."""
+
+    def lookup():
+        try:
+            result = path.stat()
+        except OSError:
+            return None
+        return result if stat.S_ISREG(result.st_mode) else None
+
+    return await run_io("stat", lookup)
@@ -0,0 +1,221 @@
+"""Signature stroke parsing, simplification and grouping for PDF export."""
+
+import math
+import re
+
+# A polyline vertex in PDF coordinates: (x, y, stroke width in points).
+StrokePoint = tuple[float, float, float]
+
+# Default visual tolerance in PDF points. 0.1pt is below one device pixel
+# even at 600 dpi, so simplified strokes print identically.
+DEFAULT_STROKE_TOLERANCE_PT = 0.1
+
+# Default stroke width quantum in PDF points. Runs whose widths fall into
+# the same bucket share one path and one stroke operator.
+DEFAULT_WIDTH_STEP_PT = 0.1
+
+# signature_pad writes coordinates with 3 decimals; segments whose start
+# lies this close to the previous end belong to the same stroke.
+_JOIN_EPSILON = 1e-2
+
+
+def parse_signature_svg(
+    svg_string: str, default_width: float, default_height: float
+) -> dict:
+    """Parse signature_pad SVG into Bézier segments and dots for PDF export."""
+    paths: list[dict] = []
+    circles: list[dict] = []
+    # Extract viewBox to know the coordinate system
+    vb_m = re.search(r'viewBox="([^"]*)"', svg_string)
+    vb_w = float(default_width)
+    vb_h = float(default_height)
+    if vb_m:
+        parts = vb_m.group(1).split()
+        if len(parts) == 4:
+            try:
+                vb_w = float(parts[2])
+                vb_h = float(parts[3])
+            except ValueError:
+                pass
+    # Extract <path d="M sx,sy C c1x,c1y c2x,c2y ex,ey" stroke-width="W" ...>
+    for m in re.finditer(r"<path\s([^>]*?)/?>", svg_string):
+        attrs = m.group(1)
+        d_m = re.search(r'd="([^"]*)"', attrs)
+        w_m = re.search(r'stroke-width="([^"]*)"', attrs)
+        if not (d_m and w_m):
+            continue
+        tokens = d_m.group(1).strip().split()
+        width = float(w_m.group(1))
+        if len(tokens) >= 6 and tokens[0] == "M" and tokens[2] == "C":
+            try:
+                start = [float(v) for v in tokens[1].split(",")]
+                c1 = [float(v) for v in tokens[3].split(",")]
+                c2 = [float(v) for v in tokens[4].split(",")]
+                end = [float(v) for v in tokens[5].split(",")]
+                paths.append(
+                    {"start": start, "c1": c1, "c2": c2, "end": end, "width": width}
+                )
+            except (ValueError, IndexError):
+                continue
+    # Extract <circle r="R" cx="X" cy="Y" ...>
+    for m in re.finditer(r"<circle\s([^>]*?)/?>", svg_string):
+        attrs = m.group(1)
+        r_m = re.search(r'\br="([^"]*)"', attrs)
+        cx_m = re.search(r'cx="([^"]*)"', attrs)
+        cy_m = re.search(r'cy="([^"]*)"', attrs)
+        if r_m and cx_m and cy_m:
+            try:
+                circles.append(
+                    {
+                        "cx": float(cx_m.group(1)),
+                        "cy": float(cy_m.group(1)),
+                        "r": float(r_m.group(1)),
+                    }
+                )
+            except ValueError:
+                continue
+    return {"paths": paths, "circles": circles, "viewBox_w": vb_w, "viewBox_h": vb_h}
+
+
+def flatten_bezier(
+    p0: tuple[float, float],
+    p1: tuple[float, float],
+    p2: tuple[float, float],
+    p3: tuple[float, float],
+    tolerance: float,
+) -> list[tuple[float, float]]:
+    """Approximate a cubic Bézier by points within ``tolerance`` (excluding p0).
+
+    Uses the uniform-subdivision bound: the chord error of n pieces is at most
+    3/4 * max(|p0 - 2p1 + p2|, |p1 - 2p2 + p3|) / n².
+    """
+    dd = max(
+        math.hypot(p0[0] - 2 * p1[0] + p2[0], p0[1] - 2 * p1[1] + p2[1]),
+        math.hypot(p1[0] - 2 * p2[0] + p3[0], p1[1] - 2 * p2[1] + p3[1]),
+    )
+    n = max(1, math.ceil(math.sqrt(0.75 * dd / tolerance))) if dd > 0 else 1
+    points = []
+    for i in range(1, n + 1):
+        t = i / n
+        mt = 1 - t
+        a, b, c, d = mt * mt * mt, 3 * mt * mt * t, 3 * mt * t * t, t * t * t
+        points.append(
+            (
+                a * p0[0] + b * p1[0] + c * p2[0] + d * p3[0],
+                a * p0[1] + b * p1[1] + c * p2[1] + d * p3[1],
+            )
+        )
+    return points
+
+
+def simplify_points(points: list[StrokePoint], tolerance: float) -> list[StrokePoint]:
+    """Ramer–Douglas–Peucker simplification that also respects stroke width.
+
+    A vertex is kept when either its distance from the simplified chord or the
+    shift of the stroke edge (half the width deviation) exceeds ``tolerance``.
+    """
+    if tolerance <= 0 or len(points) < 3:
+        return list(points)
+    keep = [False] * len(points)
+    keep[0] = keep[-1] = True
+    stack = [(0, len(points) - 1)]
+    while stack:
+        first, last = stack.pop()
+        ax, ay, aw = points[first]
+        bx, by, bw = points[last]
+        dx, dy = bx - ax, by - ay
+        chord2 = dx * dx + dy * dy
+        max_err, index = 0.0, first
+        for i in range(first + 1, last):
+            px, py, pw = points[i]
+            t = 0.0
+            if chord2 > 0:
+                t = min(1.0, max(0.0, ((px - ax) * dx + (py - ay) * dy) / chord2))
+            err = max(
+                math.hypot(px - (ax + t * dx), py - (ay + t * dy)),
+                abs(pw - (aw + t * (bw - aw))) / 2,
+            )
+            if err > max_err:
+                max_err, index = err, i
+        if max_err > tolerance:
+            keep[index] = True
+            stack.append((first, index))
+            stack.append((index, last))
+    return [p for p, k in zip(points, keep) if k]
+
+
+def build_strokes(
+    parsed: dict,
+    origin: tuple[float, float],
+    scale_x: float,
+    scale_y: float,
+    scale_w: float,
+    tolerance: float = DEFAULT_STROKE_TOLERANCE_PT,
+) -> list[list[StrokePoint]]:
+    """Turn parsed Bézier segments into simplified polylines in PDF space.
+
+    Consecutive segments sharing an endpoint are merged into one stroke,
+    flattened to half the tolerance and simplified with the other half, so the
+    result stays within ``tolerance`` points of the original curves.
+    """
+    ox, oy = origin
+
+    def to_pdf(pt: list[float]) -> tuple[float, float]:
+        return (ox + pt[0] * scale_x, oy + pt[1] * scale_y)
+
+    strokes: list[list[StrokePoint]] = []
+    current: list[StrokePoint] = []
+    last_end: list[float] | None = None
+    for pd in parsed["paths"]:
+        width = pd["width"] * scale_w
+        joined = last_end is not None and (
+            abs(pd["start"][0] - last_end[0]) <= _JOIN_EPSILON
+            and abs(pd["start"][1] - last_end[1]) <= _JOIN_EPSILON
+        )
+        if not joined:
+            if len(current) > 1:
+                strokes.append(current)
+            current = [(*to_pdf(pd["start"]), width)]
+        flat = flatten_bezier(
+            to_pdf(pd["start"]),
+            to_pdf(pd["c1"]),
+            to_pdf(pd["c2"]),
+            to_pdf(pd["end"]),
+            tolerance / 2,
+        )
+        current.extend((x, y, width) for x, y in flat)
+        last_end = pd["end"]
+    if len(current) > 1:
+        strokes.append(current)
+    return [simplify_points(stroke, tolerance / 2) for stroke in strokes]
+
+
+def quantize_width(width: float, step: float) -> float:
+    """Snap a stroke width to its bucket (``step`` <= 0 keeps it unchanged)."""
+    if step <= 0:
+        return width
+    return round(max(1, round(width / step)) * step, 4)
+
+
+def group_by_width(
+    strokes: list[list[StrokePoint]], step: float = DEFAULT_WIDTH_STEP_PT
+) -> dict[float, list[list[tuple[float, float]]]]:
+    """Split strokes into runs of similar width, grouped by quantised width.
+
+    Each returned run is a polyline whose segments all fall into the same
+    width bucket, so every bucket can be stroked as a single PDF path.
+    """
+    groups: dict[float, list[list[tuple[float, float]]]] = {}
+    for stroke in strokes:
+        run = [stroke[0][:2]]
+        run_width = None
+        for (x0, y0, w0), (x1, y1, w1) in zip(stroke, stroke[1:]):
+            width = quantize_width((w0 + w1) / 2, step)
+            if width != run_width and len(run) > 1:
+                groups.setdefault(run_width, []).append(run)
+                run = [(x0, y0)]
+            run_width = width
+            run.append((x1, y1))
+        if len(run) > 1:
+            groups.setdefault(run_width, []).append(run)
+    return groups
@@ -0,0 +1,21 @@
+"""Loaded into the sandbox's fork server before it forks any worker.
+
+Workers are forked from that server, so everything loaded here is shared
+copy-on-write by each of them from the start: PyMuPDF, the modules sandbox
+jobs are defined in, and the interpreted pages of the template PDFs below.
+A fresh worker's first job then runs like any later one. Where workers are
+spawned instead, the sandbox warm-up imports this module in each worker.
+"""
+
+import fitz  # noqa: F401  (before the job modules bind it lazily)
+
+from pdf_signature.utils import doc_index, export, render  # noqa: F401
+
+# PDFs most sessions open, e.g. the standard forms users are asked to sign.
+# Absolute paths, or relative to the backend's working directory.
+TEMPLATE_PDFS: tuple[str, ...] = ()
+
+# Leading pages of each template that are interpreted ahead of time.
+TEMPLATE_PAGES = 4
+
+render.preload_templates(TEMPLATE_PDFS, TEMPLATE_PAGES)
@@ -4,4 +4,10 @@ config = rx.Config(
 	app_name="pdf_signature",
 	plugins=[rx.plugins.TailwindV3Plugin()],
 	disable_plugins=["reflex.plugins.sitemap.SitemapPlugin"],
+	# With REFLEX_REDIS_URL set, state is kept in Redis. Uploads, exports and
+	# renders run their sandboxed jobs outside the state lock; an event holds
+	# it across at most one job (re-indexing a document whose index sidecar
+	# is gone), which with its queueing is bounded by JOB_TIMEOUT_SECONDS (30 s).
+	redis_lock_expiration=45_000,
+	redis_lock_warning_threshold=5_000,
 )
@@ -0,0 +1,68 @@
+"""
+Helpers shared by the testcases that need no running server.
+
+The testcases put this directory on ``sys.path`` and import from here:
+    sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+    from _common import TEST_PDF, percentile
+"""
+
+import math
+import random
+from pathlib import Path
+
+TEST_PDF = Path(__file__).resolve().parents[1] / "test_signature.pdf"
+
+ROOT_STATE = "reflex___state____state"
+PDF_STATE = f"{ROOT_STATE}.pdf_signature___states___pdf_state___pdf_state"
+# PDFState's substates, which own the events the testcases send.
+VIEWER_STATE = f"{PDF_STATE}.pdf_signature___states___pdf_state____viewer_state"
+BOXES_STATE = f"{PDF_STATE}.pdf_signature___states___pdf_state____boxes_state"
+SIGNING_STATE = f"{PDF_STATE}.pdf_signature___states___pdf_state____signing_state"
+UPLOAD_STATE = f"{PDF_STATE}.pdf_signature___states___pdf_state____upload_state"
+EXPORT_STATE = f"{PDF_STATE}.pdf_signature___states___pdf_state____export_state"
+
+# A short stroke in the same shape signature_pad's toSVG() produces.
+SIGNATURE_SVG = (
+    '<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 520 220" '
+    'width="520" height="220">'
+    + "".join(
+        f'<path d="M {40 + i * 20},{110 + (-1) ** i * 30} '
+        f"C {45 + i * 20},{100 + (-1) ** i * 20} {50 + i * 20},{100 - (-1) ** i * 20} "
+        f'{60 + i * 20},{110 - (-1) ** i * 30}" stroke-width="{1.5 + (i % 3) * 0.4:.2f}" '
+        'stroke="rgb(17, 24, 39)" fill="none" stroke-linecap="round"></path>'
+        for i in range(20)
+    )
+    + '<circle r="1.5" cx="470" cy="110" fill="rgb(17, 24, 39)"></circle>'
+    "</svg>"
+)
+
+
+
+def percentile(values: list[float], pct: float) -> float:
+    """Nearest-rank percentile of ``values`` (0 when empty)."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = math.ceil(pct / 100 * len(ordered)) - 1
+    return ordered[max(0, min(rank, len(ordered) - 1))]
+
+
+def signature_svg(seed: int) -> str:
+    """A distinct signature_pad-style SVG of a realistic size (~15 KB)."""
+    rng = random.Random(seed)
+    x, y = 40.0, 110.0
+    paths = []
+    for _ in range(120):
+        nx = min(max(x + rng.uniform(-12, 16), 10), 510)
+        ny = min(max(y + rng.uniform(-20, 20), 10), 210)
+        paths.append(
+            f'<path d="M {x:.3f},{y:.3f} C {x + 2:.3f},{y - 3:.3f} '
+            f'{nx - 2:.3f},{ny + 3:.3f} {nx:.3f},{ny:.3f}" '
+            f'stroke-width="{rng.uniform(1.2, 2.8):.3f}" stroke="rgb(17, 24, 39)" '
+            'fill="none" stroke-linecap="round"></path>'
+        )
+        x, y = nx, ny
+    return (
+        '<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 520 220" '
+        'width="520" height="220">' + "".join(paths) + "</svg>"
+    )
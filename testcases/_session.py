@@ -0,0 +1,162 @@
+"""
+A simulated browser tab for the testcases that drive a running backend.
+
+Drives the Reflex websocket protocol directly (no browser). Import it the
+same way as ``_common``:
+    sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+    from _session import Session
+
+Environment:
+    API_URL             backend URL (default http://127.0.0.1:8000)
+    LOAD_TIMEOUT       per-step timeout in seconds (default 60)
+"""
+
+import asyncio
+import json
+import os
+import uuid
+
+import httpx
+import socketio
+
+from _common import PDF_STATE, ROOT_STATE, UPLOAD_STATE
+
+API_URL = os.environ.get("API_URL", "http://127.0.0.1:8000").rstrip("/")
+STEP_TIMEOUT = float(os.environ.get("LOAD_TIMEOUT", "60"))
+# Reflex mounts socket.io at /_event and registers its namespace there too.
+EVENT_NAMESPACE = "/_event"
+
+
+def state_var(delta: dict, name: str):
+    """Return ``name`` from PDFState or one of its substates, if present.
+
+    Reflex suffixes backend var names (``signature_boxes_rx_state_``), so
+    match on the prefix.
+    """
+    for state, fields in delta.items():
+        if state != PDF_STATE and not state.startswith(f"{PDF_STATE}."):
+            continue
+        for key, value in fields.items():
+            if key == name or key.startswith(f"{name}_rx_state_"):
+                return value
+    return None
+
+
+class Session:
+    """One simulated browser tab talking to the Reflex backend."""
+
+    def __init__(self, http: httpx.AsyncClient):
+        self.http = http
+        self.token = str(uuid.uuid4())
+        self.sio = socketio.AsyncClient(reconnection=False)
+        self.updates: asyncio.Queue = asyncio.Queue()
+        self.delta: dict = {}
+        # Backend events chained by handlers, which a browser would send next.
+        self.pending: list[dict] = []
+        # Emitted events whose final update has not arrived yet. Reflex
+        # processes a token's events in order, so finals arrive in order too.
+        self.awaiting_final = 0
+        self.events_sent = 0
+        self.sio.on("event", self._on_update, namespace=EVENT_NAMESPACE)
+
+    async def _on_update(self, data):
+        if isinstance(data, str):
+            data = json.loads(data)
+        await self.updates.put(data)
+
+    def _merge(self, update: dict):
+        for state, fields in (update.get("delta") or {}).items():
+            self.delta.setdefault(state, {}).update(fields)
+        for event in update.get("events") or []:
+            if event.get("name", "").startswith(f"{ROOT_STATE}."):
+                self.pending.append(event)
+
+    def _consume(self, update: dict):
+        self._merge(update)
+        if update.get("final") is True and self.awaiting_final:
+            self.awaiting_final -= 1
+
+    async def _next_update(self):
+        self._consume(await asyncio.wait_for(self.updates.get(), STEP_TIMEOUT))
+
+    async def connect(self):
+        await self.sio.connect(
+            f"{API_URL}?token={self.token}",
+            namespaces=[EVENT_NAMESPACE],
+            socketio_path=EVENT_NAMESPACE,
+            transports=["websocket"],
+            wait_timeout=STEP_TIMEOUT,
+        )
+
+    async def close(self):
+        if self.sio.connected:
+            await self.sio.disconnect()
+
+    async def _emit(self, name: str, payload: dict):
+        await self.sio.emit(
+            "event",
+            {
+                "token": self.token,
+                "name": name,
+                "payload": payload,
+                "router_data": {"pathname": "/", "query": {}, "asPath": "/"},
+            },
+            namespace=EVENT_NAMESPACE,
+        )
+        self.awaiting_final += 1
+        self.events_sent += 1
+
+    async def send(self, name: str, payload: dict | None = None):
+        """Emit an event and wait for its final state update."""
+        while not self.updates.empty():
+            self._consume(self.updates.get_nowait())
+        await self._emit(name, payload or {})
+        while self.awaiting_final:
+            await self._next_update()
+
+    async def upload(self, pdf_bytes: bytes):
+        """Upload a PDF the way rx.upload_files does, consuming ndjson updates."""
+        async with self.http.stream(
+            "POST",
+            f"{API_URL}/_upload",
+            headers={
+                "Reflex-Client-Token": self.token,
+                "Reflex-Event-Handler": f"{UPLOAD_STATE}.handle_upload",
+            },
+            files={"files": ("load_test.pdf", pdf_bytes, "application/pdf")},
+            timeout=STEP_TIMEOUT,
+        ) as response:
+            response.raise_for_status()
+            async for line in response.aiter_lines():
+                if line.strip():
+                    self._merge(json.loads(line))
+        self.events_sent += 1
+        # Indexing and the first render are chained background events; wait
+        # for the full-quality image, not the draft published before it.
+        await self.wait_until(
+            lambda: state_var(self.delta, "is_uploading") is False
+            and (
+                bool(state_var(self.delta, "render_error"))
+                or state_var(self.delta, "is_rendering") is False
+                and state_var(self.delta, "page_image_is_draft") is False
+            )
+        )
+        render_error = state_var(self.delta, "render_error")
+        if render_error:
+            raise RuntimeError(f"render failed: {render_error}")
+
+    async def dispatch_pending(self):
+        """Send chained backend events (e.g. the background page render)."""
+        pending, self.pending = self.pending, []
+        for event in pending:
+            await self._emit(event["name"], event.get("payload") or {})
+
+    async def wait_until(self, predicate):
+        """Follow chained events and consume updates until ``predicate()`` holds."""
+        await self.dispatch_pending()
+        while not predicate():
+            await self._next_update()
+            await self.dispatch_pending()
+
+    def boxes(self) -> list[dict]:
+        return state_var(self.delta, "signature_boxes") or []
@@ -0,0 +1,162 @@
+"""
+Export mode benchmark: content-stream drawing vs Ink annotations.
+
+Signs an increasing number of boxes on the test PDF with every export mode
+and compares, per mode, the time to write the signatures and save the
+document, the saved size, and the bytes an incremental save appends to the
+original file. Each mode's first page is also rasterised and compared with
+the content-stream result, so a faster mode cannot pass by drawing less.
+
+Runs offline against the export code; no server is needed:
+    poetry run python testcases/export_modes/run_test.py
+
+Environment:
+    EXPORT_SIGNATURES   comma separated signature counts (default 1,10,50)
+    EXPORT_SAMPLES      timed exports per mode and count (default 10)
+    EXPORT_PROFILE      save profile of the timed exports (default fast)
+    EXPORT_MAX_DIFF     allowed mean pixel difference from "content" (default 1.0)
+"""
+
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import fitz  # PyMuPDF – already a project dependency
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from pdf_signature.utils.export import (  # noqa: E402
+    EXPORT_MODES,
+    EXPORT_PROFILES,
+    sign_document,
+)
+from _common import SIGNATURE_SVG, TEST_PDF, percentile  # noqa: E402
+
+OUTPUT_DIR = os.environ.get("OUTPUT_DIR", str(Path(__file__).parent / "output"))
+SIGNATURES = [
+    int(v) for v in os.environ.get("EXPORT_SIGNATURES", "1,10,50").split(",") if v
+]
+SAMPLES = int(os.environ.get("EXPORT_SAMPLES", "10"))
+PROFILE = os.environ.get("EXPORT_PROFILE", "fast")
+MAX_DIFF = float(os.environ.get("EXPORT_MAX_DIFF", "1.0"))
+# Resolution of the rasterised comparison.
+COMPARE_DPI = 144
+
+os.makedirs(OUTPUT_DIR, exist_ok=True)
+
+
+def make_spec(count: int) -> dict:
+    """An export spec with ``count`` signed boxes tiled over page 1."""
+    boxes = [
+        {
+            "x": 2 + (n % 5) * 19,
+            "y": 2 + (n // 5 % 10) * 9.5,
+            "w": 17,
+            "h": 7,
+            "page": 1,
+            "signature_svg": SIGNATURE_SVG,
+        }
+        for n in range(count)
+    ]
+    return {"boxes": boxes, "pad_w": 520.0, "pad_h": 220.0}
+
+
+def time_export(spec: dict, mode: str) -> tuple[float, float, bytes]:
+    """Sign and save the test PDF once; return sign ms, save ms and the bytes."""
+    doc = fitz.open(TEST_PDF)
+    try:
+        start = time.perf_counter()
+        sign_document(doc, spec, mode)
+        signed = time.perf_counter()
+        data = doc.tobytes(**EXPORT_PROFILES[PROFILE])
+        saved = time.perf_counter()
+    finally:
+        doc.close()
+    return (signed - start) * 1000, (saved - signed) * 1000, data
+
+
+def incremental_bytes(spec: dict, mode: str) -> int:
+    """Bytes an incremental save of the signatures appends to the original."""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "signed.pdf"
+        shutil.copyfile(TEST_PDF, path)
+        size = path.stat().st_size
+        doc = fitz.open(path)
+        try:
+            sign_document(doc, spec, mode)
+            doc.saveIncr()
+        finally:
+            doc.close()
+        return path.stat().st_size - size
+
+
+def mean_pixel_diff(a: bytes, b: bytes) -> float:
+    """Mean absolute difference of two PDFs' first pages, in 0–255 levels."""
+    pixmaps = []
+    for data in (a, b):
+        with fitz.open(stream=data, filetype="pdf") as doc:
+            pixmaps.append(doc[0].get_pixmap(dpi=COMPARE_DPI).samples)
+    return sum(abs(x - y) for x, y in zip(*pixmaps)) / len(pixmaps[0])
+
+
+def run() -> list[dict]:
+    results = []
+    for count in SIGNATURES:
+        spec = make_spec(count)
+        outputs = {}
+        for mode in EXPORT_MODES:
+            sign_samples, save_samples = [], []
+            for _ in range(SAMPLES):
+                sign_ms, save_ms, data = time_export(spec, mode)
+                sign_samples.append(sign_ms)
+                save_samples.append(save_ms)
+            outputs[mode] = data
+            result = {
+                "signatures": count,
+                "mode": mode,
+                "sign_p50_ms": round(percentile(sign_samples, 50), 2),
+                "save_p50_ms": round(percentile(save_samples, 50), 2),
+                "bytes": len(data),
+                "incremental_bytes": incremental_bytes(spec, mode),
+                "pixel_diff": round(mean_pixel_diff(outputs["content"], data), 3),
+            }
+            total = result["sign_p50_ms"] + result["save_p50_ms"]
+            print(
+                f"  signatures={count:<4} {mode:<14} "
+                f"sign+save p50={total:>7.1f} ms  size={len(data) / 1024:>7.1f} KB  "
+                f"incremental={result['incremental_bytes'] / 1024:>7.1f} KB  "
+                f"diff={result['pixel_diff']:.3f}"
+            )
+            results.append(result)
+    return results
+
+
+def main():
+    print(f"Export mode benchmark, {SAMPLES} exports per step, profile {PROFILE}")
+    results = run()
+    matches = all(r["pixel_diff"] <= MAX_DIFF for r in results)
+
+    report_path = os.path.join(OUTPUT_DIR, "export_modes_report.json")
+    with open(report_path, "w") as f:
+        json.dump({"profile": PROFILE, "steps": results}, f, indent=2)
+
+    print("\n" + "=" * 60)
+    for r in results:
+        if r["pixel_diff"] > MAX_DIFF:
+            print(
+                f"  ❌ {r['mode']} at {r['signatures']} signatures differs from "
+                f"content: {r['pixel_diff']:.3f} (allowed {MAX_DIFF})"
+            )
+    if matches:
+        print("  ✅ every mode renders like content-stream drawing")
+    print(f"  📄 Report saved to {report_path}")
+    print("=" * 60)
+    sys.exit(0 if matches else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,270 @@
+"""
+Multi-session load test for the PDF signature workflow.
+
+Drives the Reflex websocket protocol directly (no browser) so that many
+concurrent sessions can be simulated from a single machine.  Every session
+runs the same flow as the smoke suite:
+
+  1. Hydrate             – connect to /_event and hydrate the state
+  2. Upload PDF          – POST to /_upload, first page rendered server-side
+  3. Draw Box            – add a signature box
+  4. Open Modal          – open the signature pad for the box
+  5. Apply Signature     – send a signature_pad-style SVG
+  6. Export PDF          – export and download the signed document
+
+Every flow uploads its own copy of the test PDF (with a unique title) and
+signs with its own signature, so renders and exports are not served from
+the shared render cache or the memoized export of an earlier flow.
+
+For each concurrency level the report contains throughput (completed flows
+and events per second), p50/p95/p99 latency per step and error rates.  Run it
+against a single backend worker and sweep the concurrency to find the knee
+where throughput stops growing and tail latency explodes.
+
+Usage (via run_test_suite.sh, which manages the Reflex server):
+    LOAD_CONCURRENCY=1,2,4,8,16 poetry run ./run_test_suite.sh load_signature
+
+Environment:
+    API_URL            backend URL (default http://127.0.0.1:8000)
+    LOAD_CONCURRENCY   comma separated list of concurrent sessions to sweep
+    LOAD_ITERATIONS    flows per session at each level (default 3, at most
+                       MAX_SESSION_DOCUMENTS, as each flow opens a document)
+    LOAD_TIMEOUT       per-step timeout in seconds (default 60)
+    LOAD_MAX_ERROR_RATE  fail the run above this flow error rate (default 0.0)
+"""
+
+import asyncio
+import json
+import os
+import random
+import sys
+import time
+import uuid
+from pathlib import Path
+
+import fitz  # PyMuPDF – already a project dependency
+import httpx
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from _common import (  # noqa: E402
+    BOXES_STATE,
+    EXPORT_STATE,
+    ROOT_STATE,
+    SIGNING_STATE,
+    TEST_PDF,
+    percentile,
+    signature_svg,
+)
+from _session import API_URL, STEP_TIMEOUT, Session, state_var  # noqa: E402
+from pdf_signature.states.pdf_state import MAX_SESSION_DOCUMENTS  # noqa: E402
+
+OUTPUT_DIR = os.environ.get("OUTPUT_DIR", str(Path(__file__).parent / "output"))
+CONCURRENCY = [
+    int(v) for v in os.environ.get("LOAD_CONCURRENCY", "1,2,4,8").split(",") if v
+]
+ITERATIONS = int(os.environ.get("LOAD_ITERATIONS", "3"))
+MAX_ERROR_RATE = float(os.environ.get("LOAD_MAX_ERROR_RATE", "0.0"))
+
+STEPS = ["hydrate", "upload", "draw_box", "open_modal", "apply", "export"]
+
+os.makedirs(OUTPUT_DIR, exist_ok=True)
+
+
+# ── flow ─────────────────────────────────────────────────────────────
+
+
+def unique_pdf(pdf_bytes: bytes) -> bytes:
+    """A copy of ``pdf_bytes`` with a unique title, so it hashes differently."""
+    doc = fitz.open(stream=pdf_bytes, filetype="pdf")
+    try:
+        doc.set_metadata({**doc.metadata, "title": f"load test {uuid.uuid4()}"})
+        return doc.tobytes()
+    finally:
+        doc.close()
+
+
+class StepError(Exception):
+    """An error raised while running a named step of the flow."""
+
+    def __init__(self, step: str, error: Exception):
+        super().__init__(f"{step}: {error!r}")
+        self.step = step
+        self.error = error
+
+
+async def run_flow(session: Session, pdf_bytes: bytes, timings: dict) -> None:
+    """Run one upload → draw → sign → export flow, recording step timings."""
+
+    async def timed(step: str, coro):
+        start = time.perf_counter()
+        try:
+            await coro
+        except Exception as e:
+            raise StepError(step, e) from e
+        timings[step].append(time.perf_counter() - start)
+
+    await timed("upload", session.upload(unique_pdf(pdf_bytes)))
+    await timed(
+        "draw_box",
+        session.send(
+            f"{BOXES_STATE}.add_box",
+            {"data": json.dumps({"x": 20, "y": 20, "w": 40, "h": 25})},
+        ),
+    )
+    boxes = session.boxes()
+    if not boxes:
+        raise StepError("draw_box", RuntimeError("no signature box after add_box"))
+    box_id = boxes[-1]["id"]
+    await timed(
+        "open_modal", session.send(f"{SIGNING_STATE}.open_signing_modal", {"box_id": box_id})
+    )
+    svg = signature_svg(random.randrange(2**32))
+    await timed(
+        "apply",
+        session.send(f"{SIGNING_STATE}.apply_signature_data", {"svg_string": svg}),
+    )
+
+    async def export():
+        await session.send(f"{EXPORT_STATE}.export_signed_pdf")
+        await session.wait_until(
+            lambda: state_var(session.delta, "is_exporting") is False
+        )
+        url = state_var(session.delta, "signed_pdf_url")
+        if not url:
+            raise RuntimeError(
+                f"no signed_pdf_url: {state_var(session.delta, 'render_error')}"
+            )
+        response = await session.http.get(url, timeout=STEP_TIMEOUT)
+        response.raise_for_status()
+
+    await timed("export", export())
+
+
+async def run_session(
+    pdf_bytes: bytes, http: httpx.AsyncClient, timings: dict, errors: dict, counts: dict
+) -> None:
+    session = Session(http)
+    try:
+        start = time.perf_counter()
+        await session.connect()
+        await session.send(f"{ROOT_STATE}.hydrate")
+        timings["hydrate"].append(time.perf_counter() - start)
+    except Exception as e:
+        errors.setdefault("hydrate", []).append(repr(e))
+        counts["failed"] += ITERATIONS
+        await session.close()
+        return
+    try:
+        for _ in range(ITERATIONS):
+            try:
+                await run_flow(session, pdf_bytes, timings)
+                counts["ok"] += 1
+            except StepError as e:
+                errors.setdefault(e.step, []).append(repr(e.error))
+                counts["failed"] += 1
+    finally:
+        counts["events"] += session.events_sent
+        await session.close()
+
+
+async def run_level(concurrency: int, pdf_bytes: bytes) -> dict:
+    """Run ``concurrency`` sessions in parallel and summarise the results."""
+    timings: dict[str, list[float]] = {step: [] for step in STEPS}
+    errors: dict[str, list[str]] = {}
+    counts = {"ok": 0, "failed": 0, "events": 0}
+    limits = httpx.Limits(max_connections=concurrency * 2)
+    async with httpx.AsyncClient(limits=limits) as http:
+        start = time.perf_counter()
+        await asyncio.gather(
+            *(
+                run_session(pdf_bytes, http, timings, errors, counts)
+                for _ in range(concurrency)
+            )
+        )
+        elapsed = time.perf_counter() - start
+
+    total = counts["ok"] + counts["failed"]
+    return {
+        "concurrency": concurrency,
+        "elapsed_s": round(elapsed, 3),
+        "flows_ok": counts["ok"],
+        "flows_failed": counts["failed"],
+        "error_rate": round(counts["failed"] / total, 4) if total else 0.0,
+        "throughput_flows_per_s": round(counts["ok"] / elapsed, 3),
+        "throughput_events_per_s": round(counts["events"] / elapsed, 3),
+        "steps": {
+            step: {
+                "n": len(values),
+                "errors": len(errors.get(step, [])),
+                "p50_ms": round(percentile(values, 50) * 1000, 1),
+                "p95_ms": round(percentile(values, 95) * 1000, 1),
+                "p99_ms": round(percentile(values, 99) * 1000, 1),
+            }
+            for step, values in timings.items()
+        },
+        "error_samples": {step: msgs[:3] for step, msgs in errors.items()},
+    }
+
+
+def print_level(result: dict):
+    print(
+        f"\n  concurrency={result['concurrency']}  "
+        f"flows ok={result['flows_ok']} failed={result['flows_failed']}  "
+        f"error_rate={result['error_rate']:.2%}  "
+        f"{result['throughput_flows_per_s']:.2f} flows/s  "
+        f"{result['throughput_events_per_s']:.2f} events/s"
+    )
+    print(f"    {'step':<12}{'n':>6}{'err':>6}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    for step, s in result["steps"].items():
+        print(
+            f"    {step:<12}{s['n']:>6}{s['errors']:>6}"
+            f"{s['p50_ms']:>10.1f}{s['p95_ms']:>10.1f}{s['p99_ms']:>10.1f}"
+        )
+    for step, msgs in result["error_samples"].items():
+        print(f"    ❌ {step}: {msgs[0]}")
+
+
+# ── main ─────────────────────────────────────────────────────────────
+
+
+def main():
+    if ITERATIONS > MAX_SESSION_DOCUMENTS:
+        # Each flow opens a document; the session would drop further uploads.
+        sys.exit(
+            f"LOAD_ITERATIONS={ITERATIONS} exceeds the {MAX_SESSION_DOCUMENTS} "
+            "documents a session may hold"
+        )
+    pdf_bytes = TEST_PDF.read_bytes()
+    print(f"Load test against {API_URL}")
+    print(f"  concurrency levels: {CONCURRENCY}, {ITERATIONS} flow(s) per session")
+
+    results = []
+    for level in CONCURRENCY:
+        result = asyncio.run(run_level(level, pdf_bytes))
+        print_level(result)
+        results.append(result)
+
+    # The knee: the last level whose throughput still grew by at least 10%.
+    knee = results[0]["concurrency"] if results else 0
+    for prev, cur in zip(results, results[1:]):
+        if cur["throughput_flows_per_s"] < prev["throughput_flows_per_s"] * 1.1:
+            break
+        knee = cur["concurrency"]
+
+    report = {"api_url": API_URL, "iterations": ITERATIONS, "knee": knee, "levels": results}
+    report_path = os.path.join(OUTPUT_DIR, "load_report.json")
+    with open(report_path, "w") as f:
+        json.dump(report, f, indent=2)
+
+    print("\n" + "=" * 60)
+    print(f"  Concurrency knee: ~{knee} sessions")
+    print(f"  📄 Report saved to {report_path}")
+    print("=" * 60)
+
+    worst = max((r["error_rate"] for r in results), default=0.0)
+    sys.exit(0 if worst <= MAX_ERROR_RATE else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -8,13 +8,26 @@ Test matrix (mirrors the manual QA table):
   4. Draw signature      – draw strokes on the canvas (Bézier)
   5. Apply Signature     – signature appears inside the box on the PDF
   6. Export PDF          – signed PDF download link available
+  7. Verify export       – signed PDF matches the on-screen signature
+  8. Browser render      – the page renders through PDF.js served by the app
+                           (skipped until vendor_pdfjs.sh has run)
+
+Each step that waits on the app also records its wall-clock latency
+(upload-to-render, box creation, modal open, apply, export-link appearance);
+drawing the signature only measures Playwright's mouse input and is untimed.
+Timings are written to OUTPUT_DIR/timings.json and the run fails when a step
+exceeds its budget.  Budgets (in ms) can be overridden with a JSON object,
+e.g. LATENCY_BUDGETS='{"upload_to_render": 3000}'; set ENFORCE_BUDGETS=0 to
+record timings without failing.
 
 Usage (via run_test_suite.sh, which manages the Reflex server):
     poetry run ./run_test_suite.sh smoke_signature
 """
 
+import json
 import os
 import sys
+import time
 from pathlib import Path
 from playwright.sync_api import sync_playwright, expect
 import fitz  # PyMuPDF – already a project dependency
@@ -23,6 +36,27 @@ BASE_URL = os.environ.get("BASE_URL", "http://127.0.0.1:3000")
 HEADLESS = os.environ.get("HEADLESS", "1") != "0"
 OUTPUT_DIR = os.environ.get("OUTPUT_DIR", str(Path(__file__).parent / "output"))
 TEST_PDF = str(Path(__file__).resolve().parents[2] / "test_signature.pdf")
+# The browser render mode is only offered once vendor_pdfjs.sh has run.
+PDFJS_VENDORED = (
+    Path(__file__).resolve().parents[2] / "assets" / "pdfjs" / "pdf.min.mjs"
+).is_file()
+ENFORCE_BUDGETS = os.environ.get("ENFORCE_BUDGETS", "1") != "0"
+
+# Per-step latency budgets in milliseconds.
+DEFAULT_BUDGETS_MS = {
+    "upload_to_render": 5_000,
+    "box_creation": 3_000,
+    "modal_open": 2_000,
+    "apply": 2_000,
+    "export_link": 5_000,
+}
+BUDGETS_MS = {
+    **DEFAULT_BUDGETS_MS,
+    **json.loads(os.environ.get("LATENCY_BUDGETS", "{}")),
+}
+
+# Step name -> measured wall-clock time in milliseconds.
+TIMINGS: dict[str, float] = {}
 
 os.makedirs(OUTPUT_DIR, exist_ok=True)
 
@@ -36,6 +70,37 @@ def screenshot(page, name: str):
     print(f"  📸 {path}")
 
 
+def record_timing(step: str, start: float) -> float:
+    """Record the wall-clock time elapsed since ``start`` for ``step``."""
+    elapsed_ms = (time.perf_counter() - start) * 1000
+    TIMINGS[step] = elapsed_ms
+    budget = BUDGETS_MS.get(step)
+    suffix = f" (budget {budget:.0f} ms)" if budget is not None else ""
+    print(f"  ⏱️  {step}: {elapsed_ms:.0f} ms{suffix}")
+    return elapsed_ms
+
+
+def check_budgets() -> list[str]:
+    """Write timings.json and return the steps that exceeded their budget."""
+    report = {}
+    over_budget = []
+    for step, elapsed_ms in TIMINGS.items():
+        budget = BUDGETS_MS.get(step)
+        ok = budget is None or elapsed_ms <= budget
+        if not ok:
+            over_budget.append(step)
+        report[step] = {
+            "elapsed_ms": round(elapsed_ms, 1),
+            "budget_ms": budget,
+            "within_budget": ok,
+        }
+    path = os.path.join(OUTPUT_DIR, "timings.json")
+    with open(path, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"  📄 Timings saved to {path}")
+    return over_budget
+
+
 def wait_for_reflex(page, timeout=30_000):
     """Wait until the Reflex app has hydrated."""
     page.wait_for_function(
@@ -74,7 +139,7 @@ def inject_draw_box(page):
 
 def test_upload_pdf(page) -> bool:
     """Test 1: Upload a PDF and verify it renders."""
-    print("\n[1/6] Upload PDF")
+    print("\n[1/8] Upload PDF")
     page.goto(BASE_URL, wait_until="networkidle")
     wait_for_reflex(page)
 
@@ -82,6 +147,7 @@ def test_upload_pdf(page) -> bool:
     expect(upload_root).to_be_visible(timeout=10_000)
 
     file_input = upload_root.locator('input[type="file"]')
+    start = time.perf_counter()
     file_input.set_input_files(TEST_PDF)
     print("  ✅ File selected")
 
@@ -90,6 +156,7 @@ def test_upload_pdf(page) -> bool:
         state="visible",
         timeout=15_000,
     )
+    record_timing("upload_to_render", start)
     print("  ✅ PDF page image rendered")
     screenshot(page, "01_upload_pdf")
     return True
@@ -97,7 +164,7 @@ def test_upload_pdf(page) -> bool:
 
 def test_draw_box(page) -> bool:
     """Test 2: Click Draw Box then create a signature box."""
-    print("\n[2/6] Draw Box")
+    print("\n[2/8] Draw Box")
 
     # 1) Click "Draw Box" button to enter draw mode
     draw_btn = page.get_by_role("button", name="Draw Box")
@@ -121,23 +188,25 @@ def test_draw_box(page) -> bool:
     ex = box["x"] + box["width"] * 0.6
     ey = box["y"] + box["height"] * 0.4
 
+    start = time.perf_counter()
     page.mouse.move(sx, sy)
     page.mouse.down()
     page.mouse.move(ex, ey, steps=15)
     page.mouse.up()
-    page.wait_for_timeout(2000)
 
     # Check if drag succeeded (Sign Here should appear)
-    sign_count = page.get_by_text("Sign Here").count()
-    if sign_count > 0:
+    sign_here = page.get_by_text("Sign Here")
+    try:
+        sign_here.first.wait_for(state="visible", timeout=2_000)
+        record_timing("box_creation", start)
         print("  ✅ Signature box created via mouse drag")
-    else:
+    except Exception:
         # Fallback: inject the box data directly (same as draw_helpers.js)
         print("  ⚠️  Mouse drag didn't create box – using JS injection fallback")
+        start = time.perf_counter()
         inject_draw_box(page)
-        page.wait_for_timeout(2000)
-        sign_here = page.get_by_text("Sign Here")
         expect(sign_here).to_be_visible(timeout=5_000)
+        record_timing("box_creation", start)
         print("  ✅ Signature box created via JS injection")
 
     # Exit draw mode if still active
@@ -152,12 +221,12 @@ def test_draw_box(page) -> bool:
 
 def test_open_signing_modal(page) -> bool:
     """Test 3: Click Sign Here → modal with canvas opens."""
-    print("\n[3/6] Open Signing Modal")
+    print("\n[3/8] Open Signing Modal")
 
     sign_here = page.get_by_text("Sign Here")
     expect(sign_here).to_be_visible(timeout=5_000)
+    start = time.perf_counter()
     sign_here.click()
-    page.wait_for_timeout(1500)
 
     heading = page.get_by_role("heading", name="Signature Pad")
     expect(heading).to_be_visible(timeout=5_000)
@@ -172,7 +241,10 @@ def test_open_signing_modal(page) -> bool:
         "() => typeof window.getSignatureSVG === 'function'",
         timeout=5_000,
     )
+    record_timing("modal_open", start)
     print("  ✅ signature_pad bridge loaded")
+    # Give initSignaturePad's deferred setup time to bind the canvas.
+    page.wait_for_timeout(500)
 
     screenshot(page, "03_modal_open")
     return True
@@ -180,7 +252,7 @@ def test_open_signing_modal(page) -> bool:
 
 def test_draw_signature(page) -> bool:
     """Test 4: Draw strokes on the signature canvas."""
-    print("\n[4/6] Draw Signature Strokes")
+    print("\n[4/8] Draw Signature Strokes")
 
     canvas = page.locator("#signature-canvas")
     cbox = canvas.bounding_box()
@@ -189,6 +261,8 @@ def test_draw_signature(page) -> bool:
     cx, cy = cbox["x"], cbox["y"]
     cw, ch = cbox["width"], cbox["height"]
 
+    # Not timed: the span would measure Playwright's mouse movement and the
+    # pauses between strokes, not the UI.
     # Zig-zag stroke
     points = [
         (0.15, 0.5), (0.25, 0.3), (0.35, 0.7), (0.45, 0.3),
@@ -235,12 +309,12 @@ def test_draw_signature(page) -> bool:
 
 def test_apply_signature(page) -> bool:
     """Test 5: Click Apply Signature → signature shows in PDF box."""
-    print("\n[5/6] Apply Signature")
+    print("\n[5/8] Apply Signature")
 
     apply_btn = page.get_by_role("button", name="Apply Signature")
     expect(apply_btn).to_be_visible(timeout=5_000)
+    start = time.perf_counter()
     apply_btn.click()
-    page.wait_for_timeout(2000)
 
     # Modal should close
     heading = page.get_by_role("heading", name="Signature Pad")
@@ -250,6 +324,7 @@ def test_apply_signature(page) -> bool:
     # Green border = signed
     signed_box = page.locator(".border-green-500")
     expect(signed_box).to_be_visible(timeout=5_000)
+    record_timing("apply", start)
     print("  ✅ Signature box shows green border (signed)")
 
     screenshot(page, "05_apply_signature")
@@ -258,15 +333,16 @@ def test_apply_signature(page) -> bool:
 
 def test_export_pdf(page) -> bool:
     """Test 6: Click Export PDF → signed PDF available for download."""
-    print("\n[6/6] Export PDF")
+    print("\n[6/8] Export PDF")
 
     export_btn = page.get_by_role("button", name="Export PDF")
     expect(export_btn).to_be_visible(timeout=5_000)
+    start = time.perf_counter()
     export_btn.click()
-    page.wait_for_timeout(3000)
 
     download_link = page.get_by_role("link", name="Download Signed PDF")
     expect(download_link).to_be_visible(timeout=10_000)
+    record_timing("export_link", start)
     print("  ✅ Download Signed PDF link visible")
 
     href = download_link.get_attribute("href")
@@ -297,7 +373,7 @@ def test_verify_exported_pdf(page) -> bool:
       2) Compare the signature region against the on-screen screenshot
          to confirm they are visually consistent (non-blank, structurally similar).
     """
-    print("\n[7/7] Verify Exported PDF")
+    print("\n[7/8] Verify Exported PDF")
 
     signed_pdf_path = os.path.join(OUTPUT_DIR, "signed_output.pdf")
     assert os.path.exists(signed_pdf_path), f"signed_output.pdf not found at {signed_pdf_path}"
@@ -432,6 +508,54 @@ def test_verify_exported_pdf(page) -> bool:
     return True
 
 
+def test_browser_render(page) -> bool:
+    """Test 8: Switch to browser rendering; PDF.js draws the page.
+
+    PDF.js must be loaded from the app's own origin (assets/pdfjs/), not a CDN.
+    """
+    print("\n[8/8] Browser Render")
+
+    pdfjs_urls = []
+    page.on(
+        "request",
+        lambda request: pdfjs_urls.append(request.url)
+        if "pdf.min.mjs" in request.url or "pdf.worker.min.mjs" in request.url
+        else None,
+    )
+    page.locator('select[title="Page rendering"]').select_option("client")
+
+    canvas = page.locator("#pdf-client-canvas")
+    expect(canvas).to_be_visible(timeout=5_000)
+    # The bridge sizes the canvas and reports back once PDF.js has rendered.
+    page.wait_for_function(
+        """() => {
+            const canvas = document.getElementById('pdf-client-canvas');
+            if (!canvas || canvas.width === 0 || canvas.height === 0) return false;
+            const { data } = canvas.getContext('2d')
+                .getImageData(0, 0, canvas.width, canvas.height);
+            for (let i = 0; i < data.length; i += 4) {
+                if (data[i] < 128 && data[i + 3] > 0) return true;
+            }
+            return false;
+        }""",
+        timeout=15_000,
+    )
+    print("  ✅ Page drawn on the PDF.js canvas")
+
+    origin = page.evaluate("() => window.location.origin")
+    assert pdfjs_urls, "PDF.js was not requested"
+    foreign = [url for url in pdfjs_urls if not url.startswith(f"{origin}/pdfjs/")]
+    assert not foreign, f"PDF.js loaded from outside the app: {foreign}"
+    print(f"  ✅ PDF.js served from {origin}/pdfjs/")
+
+    screenshot(page, "08_browser_render")
+
+    page.locator('select[title="Page rendering"]').select_option("server")
+    page.wait_for_selector("#pdf-image-container img", state="visible", timeout=15_000)
+    print("  ✅ Switched back to server rendering")
+    return True
+
+
 # ── main ─────────────────────────────────────────────────────────────
 
 
@@ -445,6 +569,7 @@ def main():
         "Apply Signature",
         "Export PDF",
         "Verify Exported PDF",
+        "Browser Render",
     ]
     test_fns = [
         test_upload_pdf,
@@ -454,6 +579,7 @@ def main():
         test_apply_signature,
         test_export_pdf,
         test_verify_exported_pdf,
+        test_browser_render,
     ]
 
     with sync_playwright() as p:
@@ -464,6 +590,10 @@ def main():
         passed = 0
         failed = 0
         for name, fn in zip(test_names, test_fns):
+            if fn is test_browser_render and not PDFJS_VENDORED:
+                results[name] = "SKIP (assets/pdfjs/ missing, run vendor_pdfjs.sh)"
+                print(f"\n  ⏭️  {name}: {results[name]}")
+                continue
             try:
                 ok = fn(page)
                 results[name] = "PASS" if ok else "FAIL"
@@ -482,18 +612,29 @@ def main():
 
         browser.close()
 
+    over_budget = check_budgets()
+
     # ── summary ──
     print("\n" + "=" * 60)
     print("TEST RESULTS")
     print("=" * 60)
     for name in test_names:
         status = results.get(name, "SKIP")
-        icon = "✅" if status == "PASS" else "❌"
+        icon = "✅" if status == "PASS" else "⏭️ " if status.startswith("SKIP") else "❌"
         print(f"  {icon} {name:<30} {status}")
     print(f"\n  Total: {passed} passed, {failed} failed")
+    print("\nSTEP TIMINGS")
+    for step, elapsed_ms in TIMINGS.items():
+        budget = BUDGETS_MS.get(step)
+        icon = "❌" if step in over_budget else "✅"
+        print(f"  {icon} {step:<30} {elapsed_ms:>8.0f} ms  (budget {budget} ms)")
+    if over_budget:
+        verdict = "failing run" if ENFORCE_BUDGETS else "not enforced"
+        print(f"\n  Over budget: {', '.join(over_budget)} ({verdict})")
     print("=" * 60)
 
-    sys.exit(0 if failed == 0 else 1)
+    ok = failed == 0 and not (ENFORCE_BUDGETS and over_budget)
+    sys.exit(0 if ok else 1)
 
 
 if __name__ == "__main__":
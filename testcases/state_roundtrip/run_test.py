@@ -0,0 +1,147 @@
+"""
+State round-trip test: event latency as a session's signature count grows.
+
+Signs an increasing number of boxes in one session and, at each step, times
+the signatures applied and a burst of cheap events (zoom in/out). Every
+event loads and stores the session state, so with an external state manager
+(Redis) its latency tracks the serialized state size. Signature SVGs live in
+the blob store and boxes only carry references, so latency should stay flat.
+
+Run it against a backend using the Redis state manager, or a local
+Redis-protocol stand-in:
+    python -c "from fakeredis import TcpFakeServer; TcpFakeServer(('127.0.0.1', 6379)).serve_forever()"
+    REFLEX_REDIS_URL=redis://127.0.0.1:6379 poetry run reflex run
+    poetry run python testcases/state_roundtrip/run_test.py
+
+Environment:
+    API_URL                backend URL (default http://127.0.0.1:8000)
+    ROUNDTRIP_SIGNATURES   comma separated signature counts (default 1,10,50,100)
+    ROUNDTRIP_SAMPLES      timed events per step (default 40)
+    ROUNDTRIP_MAX_GROWTH   allowed p50 ratio, largest vs smallest count (default 2.0)
+"""
+
+import asyncio
+import json
+import os
+import sys
+import time
+from pathlib import Path
+
+import httpx
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from _common import (  # noqa: E402
+    BOXES_STATE,
+    ROOT_STATE,
+    SIGNING_STATE,
+    TEST_PDF,
+    VIEWER_STATE,
+    percentile,
+    signature_svg,
+)
+from _session import Session  # noqa: E402
+
+OUTPUT_DIR = os.environ.get("OUTPUT_DIR", str(Path(__file__).parent / "output"))
+SIGNATURES = [
+    int(v)
+    for v in os.environ.get("ROUNDTRIP_SIGNATURES", "1,10,50,100").split(",")
+    if v
+]
+SAMPLES = int(os.environ.get("ROUNDTRIP_SAMPLES", "40"))
+MAX_GROWTH = float(os.environ.get("ROUNDTRIP_MAX_GROWTH", "2.0"))
+# Below this the comparison is dominated by noise, not state size.
+NOISE_FLOOR_MS = 5.0
+
+os.makedirs(OUTPUT_DIR, exist_ok=True)
+
+
+async def sign_boxes(session: Session, count: int) -> list[float]:
+    """Add and sign boxes until the session holds ``count`` signatures.
+
+    Returns the latency of each signature applied, in milliseconds.
+    """
+    samples = []
+    while len(session.boxes()) < count:
+        n = len(session.boxes())
+        await session.send(
+            f"{BOXES_STATE}.add_box",
+            {"data": json.dumps({"x": n % 90, "y": (n * 7) % 90, "w": 8, "h": 4})},
+        )
+        box_id = session.boxes()[-1]["id"]
+        await session.send(f"{SIGNING_STATE}.open_signing_modal", {"box_id": box_id})
+        start = time.perf_counter()
+        await session.send(
+            f"{SIGNING_STATE}.apply_signature_data", {"svg_string": signature_svg(n)}
+        )
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+async def time_events(session: Session) -> list[float]:
+    samples = []
+    for i in range(SAMPLES):
+        event = "zoom_in" if i % 2 == 0 else "zoom_out"
+        start = time.perf_counter()
+        await session.send(f"{VIEWER_STATE}.{event}")
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+async def run() -> list[dict]:
+    results = []
+    async with httpx.AsyncClient() as http:
+        session = Session(http)
+        await session.connect()
+        try:
+            await session.send(f"{ROOT_STATE}.hydrate")
+            await session.upload(TEST_PDF.read_bytes())
+            for count in SIGNATURES:
+                sign_samples = await sign_boxes(session, count)
+                samples = await time_events(session)
+                boxes_bytes = len(json.dumps(session.boxes()))
+                result = {
+                    "signatures": count,
+                    "boxes_json_bytes": boxes_bytes,
+                    "p50_ms": percentile(samples, 50),
+                    "p95_ms": percentile(samples, 95),
+                    "sign_p50_ms": percentile(sign_samples, 50),
+                }
+                print(
+                    f"  signatures={count:<5} boxes={boxes_bytes / 1024:>8.1f} KB  "
+                    f"p50={result['p50_ms']:>7.1f} ms  p95={result['p95_ms']:>7.1f} ms  "
+                    f"sign p50={result['sign_p50_ms']:>7.1f} ms"
+                )
+                results.append(result)
+        finally:
+            await session.close()
+    return results
+
+
+def main():
+    print(f"State round-trip test, {SAMPLES} events per step")
+    results = asyncio.run(run())
+    checks = {}
+    for metric in ("p50_ms", "sign_p50_ms"):
+        base, last = results[0][metric], results[-1][metric]
+        allowed = max(base * MAX_GROWTH, base + NOISE_FLOOR_MS)
+        checks[metric] = {"first": base, "last": last, "allowed": allowed}
+    flat = all(c["last"] <= c["allowed"] for c in checks.values())
+
+    report_path = os.path.join(OUTPUT_DIR, "roundtrip_report.json")
+    with open(report_path, "w") as f:
+        json.dump({"checks": checks, "steps": results}, f, indent=2)
+
+    print("\n" + "=" * 60)
+    for metric, c in checks.items():
+        status = "✅ flat" if c["last"] <= c["allowed"] else "❌ grows"
+        print(
+            f"  {status}: {metric} {c['first']:.1f} ms → {c['last']:.1f} ms "
+            f"(allowed {c['allowed']:.1f} ms)"
+        )
+    print(f"  📄 Report saved to {report_path}")
+    print("=" * 60)
+    sys.exit(0 if flat else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,25 @@
+#!/bin/bash
+set -euo pipefail
+
+# Copy the PDF.js build used by assets/pdf_render_bridge.js into
+# assets/pdfjs/, so browser rendering is served from the app's own origin.
+
+PDFJS_VERSION=4.10.38
+ROOT_DIR="$(cd "$(dirname "${BASH_SOURCE[0]}")" && pwd)"
+DEST="$ROOT_DIR/assets/pdfjs"
+TARBALL_URL="https://registry.npmjs.org/pdfjs-dist/-/pdfjs-dist-$PDFJS_VERSION.tgz"
+
+TMP_DIR=$(mktemp -d)
+trap 'rm -rf "$TMP_DIR"' EXIT
+
+echo "Fetching pdfjs-dist $PDFJS_VERSION..."
+curl -fsSL "$TARBALL_URL" -o "$TMP_DIR/pdfjs.tgz"
+tar -xzf "$TMP_DIR/pdfjs.tgz" -C "$TMP_DIR"
+
+mkdir -p "$DEST"
+cp "$TMP_DIR/package/build/pdf.min.mjs" \
+   "$TMP_DIR/package/build/pdf.worker.min.mjs" \
+   "$TMP_DIR/package/LICENSE" \
+   "$DEST/"
+echo "$PDFJS_VERSION" > "$DEST/VERSION"
+echo "PDF.js $PDFJS_VERSION copied to $DEST"